@@ -1,4 +1,5 @@
 """Debug the TCG."""
+import argparse
 import asyncio
 import pprint
 import typing
@@ -12,7 +13,7 @@ T = typing.TypeVar("T")
 CHARACTER_IDS = (1301, 1103, 1501)
 
 
-def create_event_callback(id: int) -> invokator.game.Callback:
+def create_event_callback(id: int, state: typing.Callable[[], invokator.game.State]) -> invokator.game.Callback:
     """Create a callback for an event."""
 
     async def event_callback(event: invokator.game.BaseEvent[typing.Any]) -> typing.Any:
@@ -36,9 +37,9 @@ def create_event_callback(id: int) -> invokator.game.Callback:
 
             if raw_response == "view":
                 print("====================")  # noqa: T201
-                pprint.pprint(state.players[0].dict(), indent=2)  # noqa: T203
+                pprint.pprint(state().players[0].dict(), indent=2)  # noqa: T203
                 print("--------------------")  # noqa: T201
-                pprint.pprint(state.players[1].dict(), indent=2)  # noqa: T203
+                pprint.pprint(state().players[1].dict(), indent=2)  # noqa: T203
                 print("====================")  # noqa: T201
                 continue
 
@@ -59,19 +60,101 @@ def create_event_callback(id: int) -> invokator.game.Callback:
 
 def create_default_player(id: int) -> invokator.interface.Player:
     """Create a default player."""
-    characters = [
-        invokator.interface.Character.parse_obj(character)
-        for character in invokator.models.CHARACTERS
-        if character.id in CHARACTER_IDS
-    ]
-    cards = invokator.models.CARDS
-    return invokator.interface.Player(id=id, characters=characters, deck=cards)
+    return invokator.game.runner.create_player(id, CHARACTER_IDS)
 
 
-state: invokator.game.State = invokator.game.State(
-    (create_default_player(111), create_default_player(222)),
-    (create_event_callback(111), create_event_callback(222)),
-)
+def debug(_: argparse.Namespace) -> None:
+    """Play an interactive game in the terminal."""
+    state: invokator.game.State = invokator.game.State(
+        (create_default_player(111), create_default_player(222)),
+        (create_event_callback(111, lambda: state), create_event_callback(222, lambda: state)),
+    )
 
-if __name__ == "__main__":
     asyncio.run(invokator.game.main(state))
+
+
+def simulate(args: argparse.Namespace) -> None:
+    """Play bot games across all cores and print the aggregated results."""
+
+    def progress(tally: invokator.game.tournament.Tally) -> None:
+        print(f"{tally.games}/{args.games} games ({tally.games_per_second:.1f} games/s)")  # noqa: T201
+
+    tally = invokator.game.tournament.run_tournament(
+        args.games,
+        seed=args.seed,
+        workers=args.workers,
+        shard_size=args.shard_size,
+        progress=progress if args.progress else None,
+    )
+    print(tally)  # noqa: T201
+
+
+def serve(args: argparse.Namespace) -> None:
+    """Host games for remote clients over TCP."""
+
+    async def run() -> None:
+        server = invokator.game.server.GameServer(
+            args.host,
+            args.port,
+            seed=args.seed,
+            timeout=args.timeout,
+            clock=args.clock,
+            log_directory=args.log_directory,
+        )
+        await server.start()
+        print(f"serving on {server.host}:{server.port}")  # noqa: T201
+        await server.serve_forever()
+
+    asyncio.run(run())
+
+
+def replay(args: argparse.Namespace) -> None:
+    """Replay a recorded game and print its events."""
+
+    def observe(id: int, event: invokator.game.BaseEvent[typing.Any]) -> None:
+        print(id, event.__repr_name__(), event.json(separators=(", ", ": ")))  # noqa: T201
+
+    with open(args.log, "rb") as file:
+        game = invokator.game.replay.replay(file, observer=observe)
+
+    print("finished" if game.finished else "the log ends before the game")  # noqa: T201
+
+
+def main() -> None:
+    """Parse the command line and run the chosen mode."""
+    parser = argparse.ArgumentParser(prog="python -m invokator", description=__doc__)
+    parser.set_defaults(run=debug)
+    subparsers = parser.add_subparsers()
+
+    simulate_parser = subparsers.add_parser("simulate", help=simulate.__doc__)
+    simulate_parser.set_defaults(run=simulate)
+    simulate_parser.add_argument("-n", "--games", type=int, default=10000, help="amount of games to play")
+    simulate_parser.add_argument("-s", "--seed", type=int, default=0, help="seed of the first game")
+    simulate_parser.add_argument("-w", "--workers", type=int, default=None, help="amount of worker processes")
+    simulate_parser.add_argument(
+        "--shard-size",
+        type=int,
+        default=invokator.game.tournament.DEFAULT_SHARD_SIZE,
+        help="amount of games per worker task",
+    )
+    simulate_parser.add_argument("--progress", action="store_true", help="print progress after every shard")
+
+    serve_parser = subparsers.add_parser("serve", help=serve.__doc__)
+    serve_parser.set_defaults(run=serve)
+    serve_parser.add_argument("--host", default="127.0.0.1", help="address to listen on")
+    serve_parser.add_argument("-p", "--port", type=int, default=8765, help="port to listen on")
+    serve_parser.add_argument("-s", "--seed", type=int, default=None, help="seed of the games")
+    serve_parser.add_argument("--timeout", type=float, default=30.0, help="seconds a client may take per request")
+    serve_parser.add_argument("--clock", type=float, default=600.0, help="seconds a player may take per game")
+    serve_parser.add_argument("--log-directory", default=None, help="directory to record games into")
+
+    replay_parser = subparsers.add_parser("replay", help=replay.__doc__)
+    replay_parser.set_defaults(run=replay)
+    replay_parser.add_argument("log", help="recorded game to replay")
+
+    args = parser.parse_args()
+    args.run(args)
+
+
+if __name__ == "__main__":
+    main()
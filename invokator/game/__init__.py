@@ -1,5 +1,14 @@
 """Game logic."""
+from . import archive  # type: ignore # noqa
+from . import bot  # type: ignore # noqa
+from . import engine  # type: ignore # noqa
+from . import replay  # type: ignore # noqa
+from . import runner  # type: ignore # noqa
+from . import server  # type: ignore # noqa
+from . import tournament  # type: ignore # noqa
 from . import utility  # type: ignore # noqa
+from .actions import *
 from .comm import *
+from .engine import *
 from .enums import *
 from .gameloop import *
@@ -0,0 +1,29 @@
+"""Run headless bot games and report throughput."""
+import argparse
+import asyncio
+import time
+
+from . import runner
+
+
+def main() -> None:
+    """Run a batch of bot games."""
+    parser = argparse.ArgumentParser(prog="python -m invokator.game", description=__doc__)
+    parser.add_argument("-n", "--games", type=int, default=1000, help="amount of games to play")
+    parser.add_argument("-s", "--seed", type=int, default=0, help="seed of the first game")
+    parser.add_argument("-c", "--concurrency", type=int, default=None, help="maximum amount of live games")
+    parser.add_argument("--sync", action="store_true", help="play games one by one with the synchronous engine")
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    if args.sync:
+        results = runner.play_games(args.games, seed=args.seed)
+    else:
+        results = asyncio.run(runner.run_games(args.games, seed=args.seed, concurrency=args.concurrency))
+    report = runner.Report.from_results(results, time.perf_counter() - start)
+
+    print(report)  # noqa: T201
+
+
+if __name__ == "__main__":
+    main()
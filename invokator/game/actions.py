@@ -0,0 +1,49 @@
+"""Legal actions of a player."""
+import typing
+
+from invokator import models
+
+from . import enums, gameloop, utility
+
+__all__ = ["PlayerAction", "legal_actions"]
+
+
+class PlayerAction(typing.NamedTuple):
+    """A concrete action a player can take."""
+
+    action: enums.Action
+    """The kind of action."""
+
+    talent: int | None = None
+    """The talent to use when attacking."""
+
+    dice: tuple[models.Element, ...] = ()
+    """The dice to pay with."""
+
+    target: int | None = None
+    """The character to switch to."""
+
+
+def legal_actions(state: gameloop.State) -> list[PlayerAction]:
+    """Return every action the current player can take.
+
+    Every distinct dice payment of an active talent is a separate action, passive talents cannot be used.
+    Switching is left out until the rules implement it.
+    """
+    actions = [PlayerAction(enums.Action.END), PlayerAction(enums.Action.CONCEDE)]
+
+    active_character = state.me.active_character
+    if active_character is None:
+        return actions
+
+    counts = tuple(state.me.dice.counts)
+    for talent in active_character.talents:
+        if talent.type == models.TalentType.PASSIVE:
+            continue
+
+        for payment in utility.payments(counts, utility.talent_cost(talent)):
+            actions.append(
+                PlayerAction(enums.Action.ATTACK, talent=talent.id, dice=tuple(utility.to_elements(payment)))
+            )
+
+    return actions
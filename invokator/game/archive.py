@@ -0,0 +1,416 @@
+"""Columnar archives of finished games.
+
+An archive is a directory with a table of games and a table of events.
+Every column is a file of little-endian fixed width values which can be memory-mapped,
+for example with `numpy.memmap(path / "events" / "amount.bin", dtype="<i4")` or
+`numpy.frombuffer(archive.events["amount"], dtype=archive.events.dtype("amount"))`.
+`meta.json` holds the dtype of every column, the amount of rows and the event type names by tag.
+
+Every notification is stored once, as seen by its side. Events of a game are stored in consecutive rows,
+the `start` and `events` columns of the games table give their range.
+"""
+import array
+import json
+import mmap
+import os
+import pathlib
+import sys
+import typing
+
+from invokator import models
+
+from . import replay
+from .comm import codec, events
+
+__all__ = ["EVENT_COLUMNS", "GAME_COLUMNS", "Archive", "ArchiveWriter", "GameWriter", "Table"]
+
+Typecode = typing.Literal["B", "b", "H", "h", "I", "i", "Q"]
+
+_TYPECODES: dict[str, Typecode] = {"<u1": "B", "<i1": "b", "<u2": "H", "<i2": "h", "<u4": "I", "<i4": "i", "<u8": "Q"}
+"""The `array` typecode of every supported dtype."""
+
+ELEMENT_CODES: dict[models.Element, int] = {element: code for code, element in enumerate(models.Element)}
+"""The code of every element in the element column, -1 is no element."""
+
+CHARACTERS = 3
+"""The amount of character ids stored for every player, padded with 0."""
+
+
+class Column(typing.NamedTuple):
+    """A column of a table."""
+
+    dtype: str
+    """The NumPy dtype of the values."""
+
+    width: int = 1
+    """The amount of values in every row."""
+
+
+EVENT_COLUMNS: dict[str, Column] = {
+    "game": Column("<u4"),
+    "type": Column("<u1"),
+    "side": Column("<i4"),
+    "target": Column("<i4"),
+    "amount": Column("<i4"),
+    "current": Column("<i4"),
+    "element": Column("<i1"),
+    "source": Column("<i4"),
+    "talent": Column("<i4"),
+}
+"""The columns of the events table, missing fields are stored as 0 and missing elements as -1.
+
+`amount` is the damage, heal, amount or duration of an event, `current` is the resulting health.
+"""
+
+GAME_COLUMNS: dict[str, Column] = {
+    "seed": Column("<u8"),
+    "start": Column("<u8"),
+    "events": Column("<u4"),
+    "rounds": Column("<u2"),
+    "turns": Column("<u2"),
+    "players": Column("<i4", 2),
+    "characters": Column("<i4", 2 * CHARACTERS),
+    "winner": Column("<i4"),
+    "loser": Column("<i4"),
+    "conceded": Column("<u1"),
+}
+"""The columns of the games table, players and characters are in setup order and missing players are 0."""
+
+_ROW_COLUMNS = [name for name in EVENT_COLUMNS if name != "game"]
+
+_AMOUNT_FIELDS = ("damage", "heal", "amount", "duration")
+
+Row = tuple[int, ...]
+
+EventType = type[events.BaseEvent[typing.Any]]
+
+
+def _event_row(event: events.Event) -> Row:
+    """Return the event columns of an event, except for its game."""
+    values = event.__dict__
+    amount = next((values[name] for name in _AMOUNT_FIELDS if values.get(name) is not None), 0)
+    current = values.get("current")
+    element = values.get("element")
+    source = values.get("source")
+
+    return (
+        codec.register(type(event)),
+        event.side,
+        values.get("target") or 0,
+        amount,
+        current if isinstance(current, int) else 0,
+        -1 if element is None else ELEMENT_CODES[element],
+        source if isinstance(source, int) else 0,
+        values.get("talent") or 0,
+    )
+
+
+class GameWriter:
+    """Collects the events of a single game until it has finished.
+
+    `observe` implements `replay.Observer` and can be given every event sent to both players.
+    """
+
+    archive: "ArchiveWriter"
+    setup: replay.GameSetup
+
+    rows: list[Row]
+    """The event rows of the game without their game column."""
+
+    rounds: int
+    turns: int
+    loser: int | None
+    conceded: bool
+
+    def __init__(self, archive: "ArchiveWriter", setup: replay.GameSetup) -> None:
+        self.archive = archive
+        self.setup = setup
+        self.rows = []
+        self.rounds = 0
+        self.turns = 0
+        self.loser = None
+        self.conceded = False
+
+    def observe(self, player_id: int, event: events.BaseEvent[typing.Any]) -> None:
+        """Record an event unless it is a request or the copy sent to the other side."""
+        if not isinstance(event, events.Event) or event.side != player_id:
+            return
+
+        match event:
+            case events.StartRoundEvent():
+                self.rounds += 1
+            case events.StartTurnEvent():
+                self.turns += 1
+            case events.ConcededEvent():
+                self.loser = event.side
+                self.conceded = True
+            case events.LostEvent():
+                self.loser = event.side
+            case _:
+                pass
+
+        self.rows.append(_event_row(event))
+
+    def finish(self) -> None:
+        """Add the game to the archive."""
+        self.archive._add(self)
+
+
+class ArchiveWriter:
+    """Appends finished games to an archive.
+
+    Rows are buffered in memory and appended to the column files in batches,
+    `meta.json` is only updated after the columns have been written, so readers never see partial rows.
+    """
+
+    path: pathlib.Path
+
+    games: int
+    """The amount of games in the archive."""
+
+    events: int
+    """The amount of events in the archive."""
+
+    flush_rows: int
+    """The amount of buffered events which triggers a flush."""
+
+    _event_types: list[str]
+    _buffers: dict[str, dict[str, "array.array[int]"]]
+    _pending_games: int
+    _pending_events: int
+
+    def __init__(self, path: str | os.PathLike[str], *, flush_rows: int = 1 << 16) -> None:
+        self.path = pathlib.Path(path)
+        self.flush_rows = flush_rows
+
+        (self.path / "games").mkdir(parents=True, exist_ok=True)
+        (self.path / "events").mkdir(exist_ok=True)
+
+        meta = _read_meta(self.path)
+        self.games = meta["tables"]["games"]["rows"] if meta else 0
+        self.events = meta["tables"]["events"]["rows"] if meta else 0
+        self._event_types = [cls.__name__ for cls in codec.EVENT_TYPES]
+        if meta and meta["event_types"] != self._event_types[: len(meta["event_types"])]:
+            raise ValueError(f"The archive at {self.path} tags events with different types than this version.")
+
+        # drop rows of an interrupted flush which never made it into the metadata
+        for table, columns, rows in (("games", GAME_COLUMNS, self.games), ("events", EVENT_COLUMNS, self.events)):
+            for name, column in columns.items():
+                file = self.path / table / f"{name}.bin"
+                size = rows * column.width * array.array(_TYPECODES[column.dtype]).itemsize
+                if not file.exists() or file.stat().st_size != size:
+                    with open(file, "ab") as f:
+                        f.truncate(size)
+
+        self._buffers = {
+            "games": {name: array.array(_TYPECODES[column.dtype]) for name, column in GAME_COLUMNS.items()},
+            "events": {name: array.array(_TYPECODES[column.dtype]) for name, column in EVENT_COLUMNS.items()},
+        }
+        self._pending_games = 0
+        self._pending_events = 0
+
+    def game(self, setup: replay.GameSetup) -> GameWriter:
+        """Start collecting the events of a game."""
+        return GameWriter(self, setup)
+
+    def add_log(self, log: replay.GameLog) -> None:
+        """Add a recorded game."""
+        game = self.game(log.setup)
+        for player_id, event in log.deliveries:
+            game.observe(player_id, event)
+
+        game.finish()
+
+    def _add(self, game: GameWriter) -> None:
+        """Buffer the rows of a finished game."""
+        index = self.games + self._pending_games
+        start = self.events + self._pending_events
+
+        columns = self._buffers["events"]
+        columns["game"].extend([index] * len(game.rows))
+        for name, values in zip(_ROW_COLUMNS, zip(*game.rows)):
+            columns[name].extend(values)
+
+        players = [player.id for player in game.setup.players]
+        characters: list[int] = []
+        for player in game.setup.players:
+            ids = sorted(player.character_ids)[:CHARACTERS]
+            characters.extend(ids + [0] * (CHARACTERS - len(ids)))
+
+        winner = 0
+        if game.loser is not None:
+            winner = next((id for id in players if id != game.loser), 0)
+
+        row = {
+            "seed": [game.setup.seed],
+            "start": [start],
+            "events": [len(game.rows)],
+            "rounds": [game.rounds],
+            "turns": [game.turns],
+            "players": players,
+            "characters": characters,
+            "winner": [winner],
+            "loser": [game.loser or 0],
+            "conceded": [game.conceded],
+        }
+        for name, values in row.items():
+            self._buffers["games"][name].extend(values)
+
+        self._pending_games += 1
+        self._pending_events += len(game.rows)
+        if self._pending_events >= self.flush_rows:
+            self.flush()
+
+    def flush(self) -> None:
+        """Append the buffered rows to the column files."""
+        if not self._pending_games:
+            return
+
+        for table, buffers in self._buffers.items():
+            for name, values in buffers.items():
+                if sys.byteorder == "big":
+                    values.byteswap()
+
+                with open(self.path / table / f"{name}.bin", "ab") as file:
+                    values.tofile(file)
+
+                del values[:]
+
+        self.games += self._pending_games
+        self.events += self._pending_events
+        self._pending_games = self._pending_events = 0
+
+        _write_meta(self.path, self.games, self.events, self._event_types)
+
+    def close(self) -> None:
+        """Flush the remaining games."""
+        self.flush()
+
+    def __enter__(self) -> "ArchiveWriter":
+        return self
+
+    def __exit__(self, *_: object) -> None:
+        self.close()
+
+
+def _read_meta(path: pathlib.Path) -> dict[str, typing.Any] | None:
+    """Read the metadata of an archive, None if it is empty."""
+    try:
+        with open(path / "meta.json") as file:
+            return json.load(file)
+    except FileNotFoundError:
+        return None
+
+
+def _column_meta(columns: dict[str, Column]) -> dict[str, typing.Any]:
+    """Describe the columns of a table."""
+    return {name: {"dtype": column.dtype, "width": column.width} for name, column in columns.items()}
+
+
+def _write_meta(path: pathlib.Path, games: int, events: int, event_types: list[str]) -> None:
+    """Atomically replace the metadata of an archive."""
+    meta = {
+        "event_types": event_types,
+        "tables": {
+            "games": {"rows": games, "columns": _column_meta(GAME_COLUMNS)},
+            "events": {"rows": events, "columns": _column_meta(EVENT_COLUMNS)},
+        },
+    }
+    temporary = path / "meta.json.tmp"
+    with open(temporary, "w") as file:
+        json.dump(meta, file)
+
+    os.replace(temporary, path / "meta.json")
+
+
+class Table:
+    """Memory-mapped columns of a table."""
+
+    path: pathlib.Path
+
+    rows: int
+    """The amount of rows."""
+
+    columns: dict[str, Column]
+
+    _maps: dict[str, mmap.mmap]
+
+    def __init__(self, path: pathlib.Path, rows: int, columns: dict[str, Column]) -> None:
+        self.path = path
+        self.rows = rows
+        self.columns = columns
+        self._maps = {}
+
+    def __len__(self) -> int:
+        return self.rows
+
+    def dtype(self, name: str) -> str:
+        """Return the NumPy dtype of a column."""
+        return self.columns[name].dtype
+
+    def __getitem__(self, name: str) -> memoryview:
+        """Return the values of a column, rows of columns wider than 1 are flattened."""
+        column = self.columns[name]
+        typecode = _TYPECODES[column.dtype]
+        size = self.rows * column.width * array.array(typecode).itemsize
+        if not size:
+            return memoryview(b"").cast(typecode)
+
+        if name not in self._maps:
+            with open(self.path / f"{name}.bin", "rb") as file:
+                self._maps[name] = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+
+        return memoryview(self._maps[name])[:size].cast(typecode)
+
+    def close(self) -> None:
+        """Unmap every column, the returned views must have been released."""
+        for mapped in self._maps.values():
+            mapped.close()
+
+        self._maps.clear()
+
+
+class Archive:
+    """A read-only archive.
+
+    Columns are memory-mapped when they are first accessed, values are only read when they are used.
+    """
+
+    path: pathlib.Path
+
+    event_types: list[str]
+    """The name of the event class of every type tag."""
+
+    games: Table
+    events: Table
+
+    def __init__(self, path: str | os.PathLike[str]) -> None:
+        self.path = pathlib.Path(path)
+
+        meta = _read_meta(self.path)
+        if meta is None:
+            raise FileNotFoundError(f"No archive at {self.path}.")
+
+        self.event_types = meta["event_types"]
+        self.games = Table(self.path / "games", meta["tables"]["games"]["rows"], GAME_COLUMNS)
+        self.events = Table(self.path / "events", meta["tables"]["events"]["rows"], EVENT_COLUMNS)
+
+    def event_type(self, cls: EventType) -> int:
+        """Return the type tag of an event class."""
+        return self.event_types.index(cls.__name__)
+
+    def game_events(self, game: int) -> range:
+        """Return the rows of the events of a game."""
+        start = self.games["start"][game]
+        return range(start, start + self.games["events"][game])
+
+    def close(self) -> None:
+        """Unmap every column."""
+        self.games.close()
+        self.events.close()
+
+    def __enter__(self) -> "Archive":
+        return self
+
+    def __exit__(self, *_: object) -> None:
+        self.close()
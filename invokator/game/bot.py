@@ -0,0 +1,59 @@
+"""Scripted bots for headless games."""
+import random
+import typing
+
+from . import enums
+from .comm import events
+
+__all__ = ["RandomBot"]
+
+T = typing.TypeVar("T")
+
+
+class RandomBot:
+    """A bot that attacks with random talents until it runs out of dice.
+
+    Implements the `comm.Callback` protocol.
+    """
+
+    id: int
+    """The id of the player this bot plays for."""
+
+    rng: random.Random
+    """The random generator used for choices."""
+
+    can_attack: bool
+    """Whether the bot has not yet failed to pay for an attack this turn."""
+
+    def __init__(self, id: int, *, rng: random.Random | None = None) -> None:
+        self.id = id
+        self.rng = rng or random.Random()
+        self.can_attack = True
+
+    def respond(self, event: events.BaseEvent[typing.Any]) -> typing.Any:
+        """Return the response to an event."""
+        match event:
+            case events.ActionRequestEvent():
+                if self.can_attack:
+                    return enums.Action.ATTACK
+
+                self.can_attack = True
+                return enums.Action.END
+            case events.TalentRequestEvent():
+                return self.rng.choice(event.possible)
+            case events.DiceRequestEvent():
+                if event.recommended is None:
+                    self.can_attack = False
+                return event.recommended
+            case events.CharacterRequestEvent():
+                return self.rng.choice(event.possible) if event.possible else None
+            case events.DiceChangeRequestEvent():
+                return event.recommended
+            case events.CardsChangeRequestEvent():
+                return []
+            case _:
+                return None
+
+    async def __call__(self, event: events.BaseEvent[T]) -> T | None:
+        """Send an event."""
+        return self.respond(event)
@@ -1,3 +1,7 @@
 """Communication between the game and the user."""
+from . import codec, wire  # type: ignore # noqa
+from .buffered import *
 from .commtypes import *
 from .events import *
+from .spectators import *
+from .timing import *
@@ -0,0 +1,76 @@
+"""Buffered communication channels."""
+import typing
+
+from . import commtypes, events
+
+__all__ = ["BufferedChannel", "Frame", "FrameCallback", "unbuffered"]
+
+T = typing.TypeVar("T")
+
+Frame = list[events.BaseEvent[typing.Any]]
+"""Events sent together, only the last one may be a request."""
+
+FLUSH_EVENTS = (events.EndTurnEvent, events.EndRoundEvent, events.EndGameEvent)
+"""Notifications which end a frame on their own."""
+
+
+class FrameCallback(typing.Protocol):
+    """A callback for frames of events."""
+
+    async def __call__(self, frame: Frame) -> typing.Any:
+        """Send a frame, returning the response to the request at its end."""
+
+
+class BufferedChannel:
+    """A channel which queues notifications and sends them in frames.
+
+    A frame is flushed with the next request, at the end of a turn, round or game,
+    or when `flush` is called. Implements the `comm.Callback` protocol.
+    """
+
+    callback: FrameCallback
+    """The callback receiving the frames."""
+
+    pending: Frame
+    """The notifications waiting for the next frame."""
+
+    frames: int
+    """The amount of frames sent."""
+
+    def __init__(self, callback: FrameCallback) -> None:
+        self.callback = callback
+        self.pending = []
+        self.frames = 0
+
+    async def flush(self) -> typing.Any:
+        """Send the pending events as a frame."""
+        if not self.pending:
+            return None
+
+        frame, self.pending = self.pending, []
+        self.frames += 1
+        return await self.callback(frame)
+
+    async def __call__(self, event: events.BaseEvent[T]) -> T | None:
+        """Queue a notification or send a request with the pending notifications."""
+        self.pending.append(event)
+
+        if isinstance(event, events.RequestEvent):
+            return await self.flush()
+        if isinstance(event, FLUSH_EVENTS):
+            await self.flush()
+
+        return None
+
+
+def unbuffered(callback: commtypes.Callback) -> FrameCallback:
+    """Deliver every event of a frame to a callback one by one."""
+
+    async def deliver(frame: Frame) -> typing.Any:
+        response = None
+        for event in frame:
+            response = await callback(event)
+
+        return response
+
+    return deliver
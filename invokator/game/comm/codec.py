@@ -0,0 +1,206 @@
+"""Precompiled event encoders.
+
+Every event class is registered with a numeric tag in definition order.
+An encoded event is a flat list of the tag followed by its field values in declaration order,
+enums are replaced by their position in the enum and nested models by lists of their fields.
+Encoding and decoding skip pydantic validation entirely.
+"""
+import enum
+import json
+import typing
+
+import pydantic
+import pydantic.fields
+
+__all__ = [
+    "EVENT_TYPES",
+    "decode",
+    "encode",
+    "frame_from_bytes",
+    "frame_to_bytes",
+    "from_bytes",
+    "from_json",
+    "register",
+    "response_from_bytes",
+    "response_to_bytes",
+    "response_type",
+    "to_bytes",
+    "to_json",
+]
+
+Converter = typing.Callable[[typing.Any], typing.Any]
+"""Converts a single field value which is not None."""
+
+Encoder = typing.Callable[[pydantic.BaseModel], list[typing.Any]]
+Decoder = typing.Callable[[typing.Sequence[typing.Any]], pydantic.BaseModel]
+
+EVENT_TYPES: list[type[pydantic.BaseModel]] = []
+"""Every registered event class by tag."""
+
+_JSON = json.JSONEncoder(separators=(",", ":"), check_circular=False)
+
+_RESPONSE_TYPES: dict[type[pydantic.BaseModel], typing.Any] = {}
+
+_TAGS: dict[type[pydantic.BaseModel], int] = {}
+_ENCODERS: dict[type[pydantic.BaseModel], Encoder] = {}
+_DECODERS: dict[type[pydantic.BaseModel], Decoder] = {}
+
+
+def register(cls: type[pydantic.BaseModel]) -> int:
+    """Register an event class and return its tag."""
+    tag = _TAGS.get(cls)
+    if tag is None:
+        tag = _TAGS[cls] = len(EVENT_TYPES)
+        EVENT_TYPES.append(cls)
+
+    return tag
+
+
+def _field_converters(field: pydantic.fields.ModelField) -> tuple[Converter | None, Converter | None]:
+    """Return the encoding and decoding converters of a field."""
+    inner = field.type_
+    encode: Converter | None = None
+    decode: Converter | None = None
+
+    if isinstance(inner, type) and issubclass(inner, enum.Enum):
+        members = list(inner)
+        codes = {member: code for code, member in enumerate(members)}
+        encode, decode = codes.__getitem__, members.__getitem__
+    elif isinstance(inner, type) and issubclass(inner, pydantic.BaseModel):
+        encode, decode = _model_encoder(inner), _model_decoder(inner)
+
+    if encode is None or decode is None:
+        return None, None
+
+    if field.shape == pydantic.fields.SHAPE_LIST:
+        encode_item, decode_item = encode, decode
+        encode = lambda values: [encode_item(value) for value in values]  # noqa: E731
+        decode = lambda values: [decode_item(value) for value in values]  # noqa: E731
+    elif field.shape != pydantic.fields.SHAPE_SINGLETON:
+        raise TypeError(f"Cannot encode field {field.name} of shape {field.shape}.")
+
+    return encode, decode
+
+
+def _model_encoder(cls: type[pydantic.BaseModel]) -> Encoder:
+    """Compile the encoder of a model's fields."""
+    cached = _ENCODERS.get(cls)
+    if cached is not None:
+        return cached
+
+    fields = [(name, _field_converters(field)[0]) for name, field in cls.__fields__.items()]
+    names = [name for name, _ in fields]
+
+    if all(convert is None for _, convert in fields):
+
+        def encoder(model: pydantic.BaseModel) -> list[typing.Any]:
+            values = model.__dict__
+            return [values[name] for name in names]
+
+    else:
+
+        def encoder(model: pydantic.BaseModel) -> list[typing.Any]:
+            values = model.__dict__
+            return [
+                values[name] if convert is None or values[name] is None else convert(values[name])
+                for name, convert in fields
+            ]
+
+    _ENCODERS[cls] = encoder
+    return encoder
+
+
+def _model_decoder(cls: type[pydantic.BaseModel]) -> Decoder:
+    """Compile the decoder of a model's fields."""
+    cached = _DECODERS.get(cls)
+    if cached is not None:
+        return cached
+
+    fields = [(name, _field_converters(field)[1]) for name, field in cls.__fields__.items()]
+    fields_set = set(cls.__fields__)
+
+    def decoder(values: typing.Sequence[typing.Any]) -> pydantic.BaseModel:
+        model = cls.__new__(cls)
+        object.__setattr__(
+            model,
+            "__dict__",
+            {
+                name: value if convert is None or value is None else convert(value)
+                for (name, convert), value in zip(fields, values)
+            },
+        )
+        object.__setattr__(model, "__fields_set__", fields_set.copy())
+        return model
+
+    _DECODERS[cls] = decoder
+    return decoder
+
+
+def encode(event: pydantic.BaseModel) -> list[typing.Any]:
+    """Encode an event into its tag and field values."""
+    cls = type(event)
+    return [_TAGS[cls], *_model_encoder(cls)(event)]
+
+
+def decode(payload: typing.Sequence[typing.Any]) -> pydantic.BaseModel:
+    """Decode an event from its tag and field values without validation."""
+    tag: int = payload[0]
+    return _model_decoder(EVENT_TYPES[tag])(payload[1:])
+
+
+def to_json(event: pydantic.BaseModel) -> str:
+    """Encode an event into compact JSON."""
+    return _JSON.encode(encode(event))
+
+
+def from_json(data: str | bytes) -> pydantic.BaseModel:
+    """Decode an event from compact JSON."""
+    return decode(json.loads(data))
+
+
+def to_bytes(event: pydantic.BaseModel) -> bytes:
+    """Encode an event into compact UTF-8 JSON."""
+    return to_json(event).encode()
+
+
+def from_bytes(data: bytes) -> pydantic.BaseModel:
+    """Decode an event from compact UTF-8 JSON."""
+    return from_json(data)
+
+
+def frame_to_bytes(frame: typing.Sequence[pydantic.BaseModel]) -> bytes:
+    """Encode a frame of events into compact UTF-8 JSON."""
+    return _JSON.encode([encode(event) for event in frame]).encode()
+
+
+def frame_from_bytes(data: bytes) -> list[pydantic.BaseModel]:
+    """Decode a frame of events from compact UTF-8 JSON."""
+    return [decode(payload) for payload in json.loads(data)]
+
+
+def response_type(cls: type[pydantic.BaseModel]) -> typing.Any:
+    """Return the type of the response to a request class, None for notifications."""
+    if cls not in _RESPONSE_TYPES:
+        response: typing.Any = None
+        for base in getattr(cls, "__orig_bases__", ()):
+            args = typing.get_args(base)
+            if args and not isinstance(args[0], typing.TypeVar):
+                response = args[0]
+
+        _RESPONSE_TYPES[cls] = None if response is type(None) else response
+
+    return _RESPONSE_TYPES[cls]
+
+
+def response_to_bytes(response: typing.Any) -> bytes:
+    """Encode the response to a request into compact UTF-8 JSON."""
+    return _JSON.encode(response).encode()
+
+
+def response_from_bytes(cls: type[pydantic.BaseModel], data: bytes) -> typing.Any:
+    """Decode and validate the response to a request of the given class."""
+    value = json.loads(data)
+    if value is None:
+        return None
+
+    return pydantic.parse_obj_as(response_type(cls), value)
@@ -3,10 +3,13 @@ import abc
 import typing
 
 import pydantic
+from typing_extensions import Self
 
 from invokator import models
 from invokator.game import enums
 
+from . import codec
+
 T = typing.TypeVar("T")
 
 IntID = int
@@ -21,6 +24,22 @@ __all__ = ["BaseEvent", "ErrorEvent", "Event", "RequestEvent"]
 class BaseEvent(typing.Generic[T], pydantic.BaseModel):
     """Base class for events."""
 
+    def __init_subclass__(cls, **kwargs: typing.Any) -> None:
+        super().__init_subclass__(**kwargs)
+        codec.register(cls)
+
+    def project(self, side: "PlayerID") -> Self:
+        """Return the event as seen by a player."""
+        return self
+
+    def to_json(self) -> str:
+        """Serialize the event with its precompiled encoder, see `codec`."""
+        return codec.to_json(self)
+
+    def to_bytes(self) -> bytes:
+        """Serialize the event into bytes with its precompiled encoder, see `codec`."""
+        return codec.to_bytes(self)
+
 
 class ErrorEvent(BaseEvent[None]):
     """An error has occurred."""
@@ -30,11 +49,44 @@ class ErrorEvent(BaseEvent[None]):
 
 
 class Event(BaseEvent[None]):
-    """Base class for game events without requiring any reply."""
+    """Base class for game events without requiring any reply.
+
+    Fields in `hidden_fields` are only revealed to the player of the event's side,
+    everyone else receives the public projection with those fields set to None.
+    """
+
+    hidden_fields: typing.ClassVar[tuple[str, ...]] = ()
+    """Fields only revealed to the side of the event."""
 
     side: PlayerID
     """Which side this event is for."""
 
+    _public: Self | None = pydantic.PrivateAttr(None)
+
+    def public(self) -> Self:
+        """Return the projection seen by the opponent and spectators.
+
+        The projection is created once and shared by every recipient.
+        """
+        if not self.hidden_fields:
+            return self
+
+        public = getattr(self, "_public", None)
+        if public is None:
+            public = type(self).__new__(type(self))
+            values = self.__dict__.copy()
+            values.update(dict.fromkeys(self.hidden_fields))
+            object.__setattr__(public, "__dict__", values)
+            object.__setattr__(public, "__fields_set__", self.__fields_set__)
+            object.__setattr__(public, "_public", public)
+            self._public = public
+
+        return public
+
+    def project(self, side: PlayerID) -> Self:
+        """Return the event as seen by a player."""
+        return self if side == self.side else self.public()
+
 
 # ====================
 # Turn events
@@ -299,6 +351,8 @@ class SwitchEvent(Event):
 class HandChangeEvent(Event, abc.ABC):
     """The amount of cards in a hand has changed."""
 
+    hidden_fields = ("current",)
+
     current_amount: int
     """The current amount of cards in the hand."""
 
@@ -317,6 +371,8 @@ class HandChangeEvent(Event, abc.ABC):
 class CardDrawEvent(HandChangeEvent):
     """Cards have been drawn from the deck."""
 
+    hidden_fields = ("current", "cards")
+
     amount: int
     """The amount of cards drawn."""
 
@@ -334,6 +390,8 @@ class CardDrawEvent(HandChangeEvent):
 class CardDiscardEvent(HandChangeEvent):
     """Cards have been discarded from the hand."""
 
+    hidden_fields = ("current", "cards")
+
     amount: int
     """The amount of cards discarded."""
 
@@ -351,6 +409,8 @@ class CardDiscardEvent(HandChangeEvent):
 class CardsChangeEvent(HandChangeEvent):
     """Cards have been drawn from the deck."""
 
+    hidden_fields = ("current", "discarded_cards", "drawn_cards")
+
     amount: int
     """The amount of cards drawn."""
 
@@ -378,6 +438,8 @@ class CardsChangeEvent(HandChangeEvent):
 class DiceChangeEvent(Event, abc.ABC):
     """Player's dice have changed."""
 
+    hidden_fields = ("current",)
+
     current_amount: int
     """The current amount of dice."""
 
@@ -396,6 +458,8 @@ class DiceChangeEvent(Event, abc.ABC):
 class DiceAddEvent(DiceChangeEvent):
     """Player's dice have changed."""
 
+    hidden_fields = ("current", "dice")
+
     amount: int
     """The amount of dice added."""
 
@@ -413,6 +477,8 @@ class DiceAddEvent(DiceChangeEvent):
 class DiceRemoveEvent(DiceChangeEvent):
     """Player's dice have changed."""
 
+    hidden_fields = ("current", "dice")
+
     amount: int
     """The amount of dice removed."""
 
@@ -430,6 +496,8 @@ class DiceRemoveEvent(DiceChangeEvent):
 class DiceRerollEvent(DiceChangeEvent):
     """Player's dice have changed."""
 
+    hidden_fields = ("current", "rerolled_dice", "new_dice")
+
     amount: int
     """The amount of dice rerolled."""
 
@@ -525,3 +593,6 @@ class DiceChangeRequestEvent(RequestEvent[list[models.Element]]):
 
     possible: list[models.Element]
     """The dice that can be chosen."""
+
+    recommended: list[models.Element] = pydantic.Field(default_factory=list)
+    """The dice which give the best odds of affording the active character's talents."""
@@ -0,0 +1,152 @@
+"""Fan-out of game events to spectators."""
+import asyncio
+import collections
+import typing
+
+from . import events, wire
+
+__all__ = ["Spectator", "Spectators"]
+
+Encoder = typing.Callable[[events.BaseEvent[typing.Any]], bytes]
+"""Encodes an event into the bytes sent to spectators."""
+
+
+class Spectator:
+    """The pending events of a single observer.
+
+    Events are queued without ever waiting for the observer. Once `limit` events are pending,
+    a lagging spectator skips its oldest events while any other spectator is dropped.
+    """
+
+    limit: int
+    """The amount of events which may be pending."""
+
+    lag: bool
+    """Whether to skip events instead of dropping the spectator when it falls behind."""
+
+    skipped: int
+    """The amount of events skipped by lagging."""
+
+    closed: bool
+    """Whether no more events will be queued."""
+
+    dropped: bool
+    """Whether the spectator has been dropped for falling behind."""
+
+    _pending: collections.deque[bytes]
+    _waiter: "asyncio.Future[None] | None"
+
+    def __init__(self, *, limit: int = 1024, lag: bool = True) -> None:
+        self.limit = limit
+        self.lag = lag
+        self.skipped = 0
+        self.closed = False
+        self.dropped = False
+
+        self._pending = collections.deque()
+        self._waiter = None
+
+    def __len__(self) -> int:
+        return len(self._pending)
+
+    def put(self, data: bytes) -> None:
+        """Queue an encoded event."""
+        if self.closed:
+            return
+
+        if len(self._pending) >= self.limit:
+            if not self.lag:
+                self.drop()
+                return
+
+            self._pending.popleft()
+            self.skipped += 1
+
+        self._pending.append(data)
+        self._wake()
+
+    def close(self) -> None:
+        """Stop queueing events, the pending ones can still be read."""
+        self.closed = True
+        self._wake()
+
+    def drop(self) -> None:
+        """Stop queueing events and discard the pending ones."""
+        self.dropped = True
+        self._pending.clear()
+        self.close()
+
+    def _wake(self) -> None:
+        """Wake up the reader waiting for events."""
+        if self._waiter is not None and not self._waiter.done():
+            self._waiter.set_result(None)
+
+    async def get(self) -> list[bytes]:
+        """Wait for pending events and return all of them, an empty list once the spectator is closed."""
+        while not self._pending:
+            if self.closed:
+                return []
+
+            self._waiter = asyncio.get_running_loop().create_future()
+            try:
+                await self._waiter
+            finally:
+                self._waiter = None
+
+        pending = list(self._pending)
+        self._pending.clear()
+        return pending
+
+
+class Spectators:
+    """Fans out the public projection of every event sent to both players.
+
+    Every event is encoded once and the same bytes are queued for every spectator,
+    nothing is encoded while there are no spectators.
+    """
+
+    encode: Encoder
+    """The encoder of the bytes sent to spectators."""
+
+    spectators: list[Spectator]
+    """The attached spectators."""
+
+    def __init__(self, encode: Encoder = wire.encode_event) -> None:
+        self.encode = encode
+        self.spectators = []
+
+    def __len__(self) -> int:
+        return len(self.spectators)
+
+    def attach(self, *, limit: int = 1024, lag: bool = True) -> Spectator:
+        """Attach a new spectator."""
+        spectator = Spectator(limit=limit, lag=lag)
+        self.spectators.append(spectator)
+        return spectator
+
+    def detach(self, spectator: Spectator) -> None:
+        """Detach a spectator."""
+        spectator.close()
+        if spectator in self.spectators:
+            self.spectators.remove(spectator)
+
+    def publish(self, event: events.BaseEvent[typing.Any]) -> None:
+        """Queue the public projection of an event for every spectator."""
+        if not self.spectators or not isinstance(event, events.Event):
+            return
+
+        data = self.encode(event.public())
+        closed = False
+        for spectator in self.spectators:
+            spectator.put(data)
+            closed = closed or spectator.closed
+
+        if closed:
+            self.spectators = [spectator for spectator in self.spectators if not spectator.closed]
+
+    def close(self) -> None:
+        """Close every spectator at the end of the game."""
+        for spectator in self.spectators:
+            spectator.close()
+
+        self.spectators = []
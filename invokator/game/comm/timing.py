@@ -0,0 +1,184 @@
+"""Deadlines and chess clocks for communication channels."""
+import asyncio
+import heapq
+import typing
+
+from invokator.game import enums
+
+from . import commtypes, events
+
+__all__ = ["TIMEOUT_RESPONSES", "TimedChannel", "Timers"]
+
+T = typing.TypeVar("T")
+
+TIMEOUT_RESPONSES: dict[type[events.BaseEvent[typing.Any]], typing.Any] = {
+    events.ActionRequestEvent: enums.Action.END,
+}
+"""Responses used when a request times out, None for every other request."""
+
+
+class Timers:
+    """Deadlines of many tasks backed by a single heap and a single loop timer.
+
+    An expired task is cancelled, its owner is expected to catch the cancellation.
+    """
+
+    _heap: list[tuple[float, int]]
+    """Deadlines by entry, removed entries are skipped lazily."""
+
+    _tasks: dict[int, "asyncio.Task[typing.Any]"]
+    """The task of every active entry."""
+
+    _expired: set[int]
+    """The entries whose tasks have been cancelled."""
+
+    _handle: asyncio.TimerHandle | None
+    _next_entry: int
+
+    def __init__(self) -> None:
+        self._heap = []
+        self._tasks = {}
+        self._expired = set()
+        self._handle = None
+        self._next_entry = 0
+
+    def __len__(self) -> int:
+        return len(self._tasks)
+
+    def add(self, deadline: float, task: "asyncio.Task[typing.Any]") -> int:
+        """Cancel a task at a loop time unless its entry is removed first."""
+        entry = self._next_entry
+        self._next_entry += 1
+
+        self._tasks[entry] = task
+        heapq.heappush(self._heap, (deadline, entry))
+        self._schedule()
+        return entry
+
+    def remove(self, entry: int) -> bool:
+        """Remove an entry and return whether it has expired."""
+        self._tasks.pop(entry, None)
+        if entry in self._expired:
+            self._expired.discard(entry)
+            return True
+
+        # keep the heap bounded by the active entries when deadlines are far away
+        if len(self._heap) > 2 * len(self._tasks) + 64:
+            self._heap = [item for item in self._heap if item[1] in self._tasks]
+            heapq.heapify(self._heap)
+
+        return False
+
+    def _schedule(self) -> None:
+        """Arm the loop timer for the earliest active deadline."""
+        while self._heap and self._heap[0][1] not in self._tasks:
+            heapq.heappop(self._heap)
+
+        if not self._heap:
+            if self._handle is not None:
+                self._handle.cancel()
+                self._handle = None
+            return
+
+        deadline = self._heap[0][0]
+        if self._handle is not None:
+            if self._handle.when() <= deadline:
+                return
+
+            self._handle.cancel()
+
+        self._handle = asyncio.get_running_loop().call_at(deadline, self._fire)
+
+    def _fire(self) -> None:
+        """Cancel the tasks of every expired entry."""
+        self._handle = None
+        now = asyncio.get_running_loop().time()
+
+        while self._heap and self._heap[0][0] <= now:
+            _, entry = heapq.heappop(self._heap)
+            task = self._tasks.pop(entry, None)
+            if task is not None:
+                self._expired.add(entry)
+                task.cancel()
+
+        self._schedule()
+
+
+class TimedChannel:
+    """A channel which gives up on slow callbacks.
+
+    Every event has a deadline, requests are also limited by the player's remaining clock.
+    A request which times out gets its entry in `TIMEOUT_RESPONSES` as the response,
+    once the clock has run out requests are answered with it immediately.
+    Implements the `comm.Callback` protocol.
+    """
+
+    callback: commtypes.Callback
+    """The wrapped channel."""
+
+    timers: Timers
+    """The timers shared by every channel of a server."""
+
+    timeout: float | None
+    """The time limit of a single event in seconds."""
+
+    remaining: float | None
+    """The time left on the player's clock in seconds."""
+
+    timeouts: int
+    """The amount of events which have timed out."""
+
+    def __init__(
+        self,
+        callback: commtypes.Callback,
+        timers: Timers,
+        *,
+        timeout: float | None = None,
+        clock: float | None = None,
+    ) -> None:
+        self.callback = callback
+        self.timers = timers
+        self.timeout = timeout
+        self.remaining = clock
+        self.timeouts = 0
+
+    def _limit(self, event: events.BaseEvent[typing.Any]) -> float | None:
+        """Return the time limit of an event."""
+        if not isinstance(event, events.RequestEvent) or self.remaining is None:
+            return self.timeout
+
+        return self.remaining if self.timeout is None else min(self.timeout, self.remaining)
+
+    async def __call__(self, event: events.BaseEvent[T]) -> T | None:
+        """Send an event unless it takes too long."""
+        request = isinstance(event, events.RequestEvent)
+        default = TIMEOUT_RESPONSES.get(type(event)) if request else None
+
+        limit = self._limit(event)
+        if limit is None:
+            return await self.callback(event)
+        if limit <= 0:
+            self.timeouts += 1
+            return default
+
+        loop = asyncio.get_running_loop()
+        task = asyncio.current_task()
+        assert task is not None
+
+        start = loop.time()
+        entry = self.timers.add(start + limit, task)
+        try:
+            return await self.callback(event)
+        except asyncio.CancelledError:
+            if not self.timers.remove(entry):
+                raise
+
+            if hasattr(task, "uncancel"):
+                task.uncancel()
+
+            self.timeouts += 1
+            return default
+        finally:
+            self.timers.remove(entry)
+            if request and self.remaining is not None:
+                self.remaining = max(0.0, self.remaining - (loop.time() - start))
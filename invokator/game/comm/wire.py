@@ -0,0 +1,282 @@
+"""Compact binary wire protocol.
+
+Events are encoded as their codec tag followed by their fields in declaration order:
+
+- ints are zigzag varints, strings are a varint length followed by UTF-8
+- enums are a single byte with the position of the member in the enum
+- lists are a varint length followed by the items, nested models are their fields
+- nullable values are prefixed by a byte which is 0 for None
+
+A frame is a varint amount of events followed by the events.
+Responses are encoded the same way with the response type of their request.
+"""
+import enum
+import types
+import typing
+
+import pydantic
+
+from . import codec
+
+__all__ = [
+    "decode_event",
+    "decode_frame",
+    "decode_response",
+    "encode_event",
+    "encode_frame",
+    "encode_response",
+    "read_varint",
+    "write_varint",
+]
+
+Writer = typing.Callable[[bytearray, typing.Any], None]
+Reader = typing.Callable[[bytes, int], tuple[typing.Any, int]]
+
+_WRITERS: dict[typing.Any, Writer] = {}
+_READERS: dict[typing.Any, Reader] = {}
+
+
+def write_varint(buffer: bytearray, value: int) -> None:
+    """Write an unsigned varint."""
+    while value > 0x7F:
+        buffer.append(value & 0x7F | 0x80)
+        value >>= 7
+
+    buffer.append(value)
+
+
+def read_varint(data: bytes, position: int) -> tuple[int, int]:
+    """Read an unsigned varint."""
+    value = shift = 0
+    while True:
+        byte = data[position]
+        position += 1
+        value |= (byte & 0x7F) << shift
+        if byte < 0x80:
+            return value, position
+
+        shift += 7
+
+
+def _write_int(buffer: bytearray, value: int) -> None:
+    """Write a zigzag varint."""
+    write_varint(buffer, value << 1 if value >= 0 else (-value << 1) - 1)
+
+
+def _read_int(data: bytes, position: int) -> tuple[int, int]:
+    """Read a zigzag varint."""
+    value, position = read_varint(data, position)
+    return value >> 1 if not value & 1 else -((value + 1) >> 1), position
+
+
+def _write_str(buffer: bytearray, value: str) -> None:
+    """Write a length-prefixed string."""
+    encoded = value.encode()
+    write_varint(buffer, len(encoded))
+    buffer += encoded
+
+
+def _read_str(data: bytes, position: int) -> tuple[str, int]:
+    """Read a length-prefixed string."""
+    length, position = read_varint(data, position)
+    end = position + length
+    return data[position:end].decode(), end
+
+
+def _write_bool(buffer: bytearray, value: bool) -> None:
+    """Write a single byte boolean."""
+    buffer.append(value)
+
+
+def _read_bool(data: bytes, position: int) -> tuple[bool, int]:
+    """Read a single byte boolean."""
+    return bool(data[position]), position + 1
+
+
+_PRIMITIVES: dict[typing.Any, tuple[Writer, Reader]] = {
+    int: (_write_int, _read_int),
+    str: (_write_str, _read_str),
+    bool: (_write_bool, _read_bool),
+}
+
+
+def _enum(cls: type[enum.Enum]) -> tuple[Writer, Reader]:
+    """Compile the single byte codes of an enum."""
+    members = list(cls)
+    codes = {member: code for code, member in enumerate(members)}
+    if len(members) > 0xFF:
+        raise TypeError(f"Enum {cls.__name__} has too many members for a single byte.")
+
+    def write(buffer: bytearray, value: enum.Enum) -> None:
+        buffer.append(codes[value])
+
+    def read(data: bytes, position: int) -> tuple[enum.Enum, int]:
+        return members[data[position]], position + 1
+
+    return write, read
+
+
+def _list(item: typing.Any) -> tuple[Writer, Reader]:
+    """Compile a length-prefixed list."""
+    write_item, read_item = _compile(item)
+
+    def write(buffer: bytearray, values: list[typing.Any]) -> None:
+        write_varint(buffer, len(values))
+        for value in values:
+            write_item(buffer, value)
+
+    def read(data: bytes, position: int) -> tuple[list[typing.Any], int]:
+        length, position = read_varint(data, position)
+        values: list[typing.Any] = []
+        for _ in range(length):
+            value, position = read_item(data, position)
+            values.append(value)
+
+        return values, position
+
+    return write, read
+
+
+def _nullable(write_value: Writer, read_value: Reader) -> tuple[Writer, Reader]:
+    """Prefix a value with whether it is present."""
+
+    def write(buffer: bytearray, value: typing.Any) -> None:
+        if value is None:
+            buffer.append(0)
+        else:
+            buffer.append(1)
+            write_value(buffer, value)
+
+    def read(data: bytes, position: int) -> tuple[typing.Any, int]:
+        if not data[position]:
+            return None, position + 1
+
+        return read_value(data, position + 1)
+
+    return write, read
+
+
+def _model(cls: type[pydantic.BaseModel]) -> tuple[Writer, Reader]:
+    """Compile the fields of a model in declaration order."""
+    fields: list[tuple[str, Writer, Reader]] = []
+    for name, field in cls.__fields__.items():
+        write_field, read_field = _compile(field.outer_type_)
+        if field.allow_none:
+            write_field, read_field = _nullable(write_field, read_field)
+
+        fields.append((name, write_field, read_field))
+
+    fields_set = set(cls.__fields__)
+
+    def write(buffer: bytearray, model: pydantic.BaseModel) -> None:
+        values = model.__dict__
+        for name, write_field, _ in fields:
+            write_field(buffer, values[name])
+
+    def read(data: bytes, position: int) -> tuple[pydantic.BaseModel, int]:
+        values: dict[str, typing.Any] = {}
+        for name, _, read_field in fields:
+            values[name], position = read_field(data, position)
+
+        model = cls.__new__(cls)
+        object.__setattr__(model, "__dict__", values)
+        object.__setattr__(model, "__fields_set__", fields_set.copy())
+        return model, position
+
+    return write, read
+
+
+def _compile(annotation: typing.Any) -> tuple[Writer, Reader]:
+    """Compile the writer and reader of a type."""
+    if annotation in _WRITERS:
+        return _WRITERS[annotation], _READERS[annotation]
+
+    origin = typing.get_origin(annotation)
+    args = typing.get_args(annotation)
+
+    if annotation in _PRIMITIVES:
+        compiled = _PRIMITIVES[annotation]
+    elif isinstance(annotation, type) and issubclass(annotation, enum.Enum):
+        compiled = _enum(annotation)
+    elif isinstance(annotation, type) and issubclass(annotation, pydantic.BaseModel):
+        compiled = _model(annotation)
+    elif origin is list:
+        compiled = _list(args[0])
+    elif origin in (typing.Union, types.UnionType) and type(None) in args:
+        (inner,) = (arg for arg in args if arg is not type(None))
+        compiled = _nullable(*_compile(inner))
+    else:
+        raise TypeError(f"Cannot encode {annotation!r}.")
+
+    _WRITERS[annotation], _READERS[annotation] = compiled
+    return compiled
+
+
+def _write_event(buffer: bytearray, event: pydantic.BaseModel) -> None:
+    """Write an event with its tag."""
+    cls = type(event)
+    write_varint(buffer, codec.register(cls))
+    _compile(cls)[0](buffer, event)
+
+
+def _read_event(data: bytes, position: int) -> tuple[pydantic.BaseModel, int]:
+    """Read an event with its tag."""
+    tag, position = read_varint(data, position)
+    return _compile(codec.EVENT_TYPES[tag])[1](data, position)
+
+
+def encode_event(event: pydantic.BaseModel) -> bytes:
+    """Encode an event."""
+    buffer = bytearray()
+    _write_event(buffer, event)
+    return bytes(buffer)
+
+
+def decode_event(data: bytes) -> pydantic.BaseModel:
+    """Decode an event."""
+    return _read_event(data, 0)[0]
+
+
+def encode_frame(frame: typing.Sequence[pydantic.BaseModel]) -> bytes:
+    """Encode a frame of events."""
+    buffer = bytearray()
+    write_varint(buffer, len(frame))
+    for event in frame:
+        _write_event(buffer, event)
+
+    return bytes(buffer)
+
+
+def decode_frame(data: bytes) -> list[pydantic.BaseModel]:
+    """Decode a frame of events."""
+    amount, position = read_varint(data, 0)
+    frame: list[pydantic.BaseModel] = []
+    for _ in range(amount):
+        event, position = _read_event(data, position)
+        frame.append(event)
+
+    return frame
+
+
+def _response(cls: type[pydantic.BaseModel]) -> tuple[Writer, Reader]:
+    """Compile the nullable response to a request class."""
+    key = ("response", cls)
+    if key not in _WRITERS:
+        _WRITERS[key], _READERS[key] = _nullable(*_compile(codec.response_type(cls)))
+
+    return _WRITERS[key], _READERS[key]
+
+
+def encode_response(cls: type[pydantic.BaseModel], response: typing.Any) -> bytes:
+    """Encode the response to a request of the given class."""
+    buffer = bytearray()
+    _response(cls)[0](buffer, response)
+    return bytes(buffer)
+
+
+def decode_response(cls: type[pydantic.BaseModel], data: bytes) -> typing.Any:
+    """Decode the response to a request of the given class.
+
+    Enum and list responses are checked by the reader, invalid data raises an error.
+    """
+    return _response(cls)[1](data, 0)[0]
@@ -0,0 +1,122 @@
+"""Synchronous step-based game engine."""
+import random
+import typing
+
+from invokator import interface
+
+from . import gameloop
+from .comm import events
+
+__all__ = ["Delivery", "Engine", "Responder", "Step"]
+
+T = typing.TypeVar("T")
+
+Delivery = typing.Tuple[int, events.BaseEvent[typing.Any]]
+"""An event together with the id of the player it is meant for."""
+
+Step = typing.Tuple[typing.List[Delivery], typing.Optional[Delivery]]
+"""The notifications sent during a step and the next request, if the game is not over."""
+
+Responder = typing.Callable[[events.BaseEvent[typing.Any]], typing.Any]
+"""A synchronous version of `comm.Callback`."""
+
+
+def _sequential(rule: gameloop.Rule[T]) -> typing.Generator[gameloop.Send, typing.Any, T]:
+    """Flatten the parallel rules of both players into sequential ones."""
+    response: typing.Any = None
+
+    while True:
+        try:
+            instruction = rule.send(response)
+        except StopIteration as e:
+            return typing.cast(T, e.value)
+
+        if isinstance(instruction, gameloop.Parallel):
+            results: list[typing.Any] = []
+            for subrule in instruction.rules:
+                results.append((yield from _sequential(subrule)))
+
+            response = tuple(results)
+        else:
+            response = yield instruction
+
+
+class Engine:
+    """Game engine driven by explicit responses instead of callbacks.
+
+    Runs the same rules as `gameloop.main` as a plain state machine,
+    without awaiting the players for every notification.
+    """
+
+    state: gameloop.State
+    """The game state."""
+
+    request: Delivery | None
+    """The request waiting for a response."""
+
+    finished: bool
+    """Whether the game has ended."""
+
+    _rules: typing.Generator[gameloop.Send, typing.Any, None]
+
+    def __init__(
+        self,
+        players: gameloop.Pair[interface.Player],
+        *,
+        rng: random.Random | None = None,
+        rules: typing.Callable[[gameloop.State], gameloop.Rule[None]] = gameloop.play,
+    ) -> None:
+        self.state = gameloop.State(players, None, rng=rng)
+        self.request = None
+        self.finished = False
+
+        self._rules = _sequential(rules(self.state))
+
+    def _advance(self, response: typing.Any) -> Step:
+        """Run the rules until the next request."""
+        delivered: list[Delivery] = []
+
+        try:
+            instruction = self._rules.send(response)
+            while not isinstance(instruction.event, events.RequestEvent):
+                if len(instruction.players) > 1:
+                    self.state.spectators.publish(instruction.event)
+
+                delivered.extend((player.id, instruction.event.project(player.id)) for player in instruction.players)
+                instruction = self._rules.send(None)
+        except StopIteration:
+            self.request = None
+            self.finished = True
+            self.state.spectators.close()
+            return delivered, None
+
+        self.request = (instruction.players[0].id, instruction.event)
+        return delivered, self.request
+
+    def start(self) -> Step:
+        """Start the game."""
+        if self.request is not None or self.finished:
+            raise RuntimeError("The game has already been started.")
+
+        return self._advance(None)
+
+    def step(self, response: typing.Any) -> Step:
+        """Answer the pending request and run the game until the next one."""
+        if self.request is None:
+            raise RuntimeError("No request is waiting for a response.")
+
+        return self._advance(response)
+
+    def run(self, responders: typing.Mapping[int, Responder]) -> None:
+        """Run the whole game, sending every event to the responder of its player."""
+        delivered, request = self.start()
+
+        while True:
+            for player_id, event in delivered:
+                responders[player_id](event)
+
+            if request is None:
+                return
+
+            player_id, event = request
+            delivered, request = self.step(responders[player_id](event))
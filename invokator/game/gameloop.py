@@ -1,22 +1,50 @@
 """TCG game loop."""
 import asyncio
+import collections
 import random
 import typing
 
-from typing_extensions import Self
-
 from invokator import interface, models
 
 from . import comm, enums, utility
 from .comm import events
 
-__all__ = ["State", "main"]
+__all__ = ["Parallel", "Rule", "Send", "State", "drive", "main", "play", "play_rounds", "start"]
 
 T = typing.TypeVar("T")
 
 Pair = typing.Tuple[T, T]
 
 
+class Send(typing.NamedTuple):
+    """Instruction to send an event to players.
+
+    Requests are sent to exactly one player, their response is sent back into the rule.
+    """
+
+    players: tuple[interface.Player, ...]
+    """The players to send the event to."""
+
+    event: events.BaseEvent[typing.Any]
+    """The event to send."""
+
+
+class Parallel(typing.NamedTuple):
+    """Instruction to run the rules of both players at the same time.
+
+    A tuple of the rules' return values is sent back into the rule.
+    """
+
+    rules: "tuple[Rule[typing.Any], Rule[typing.Any]]"
+    """The rules to run."""
+
+
+Instruction = typing.Union[Send, Parallel]
+
+Rule = typing.Generator[Instruction, typing.Any, T]
+"""Game rules which yield instructions to a driver instead of awaiting the players."""
+
+
 class IDModel(typing.Protocol):
     """Protocol for models with an ID."""
 
@@ -29,21 +57,71 @@ def to_ids(items: typing.Iterable[IDModel]) -> list[int]:
 
 
 class State:
-    """The game state."""
+    """The game state.
+
+    The `send_*` helpers and `request` only build the instructions which rules yield, nothing is sent until
+    a driver runs the rule: await `drive(state, rule)` over the communication channels or step an `engine.Engine`.
+    """
 
     players: Pair[interface.Player]
     """The players."""
 
-    comms: Pair[comm.Callback]
-    """The communication channels."""
+    comms: Pair[comm.Callback] | None
+    """The communication channels.
+
+    If this is None, the game is driven synchronously by an engine.
+    """
 
-    def __init__(self, players: Pair[interface.Player], comms: Pair[comm.Callback]) -> None:
+    rng: random.Random
+    """The random generator for game-wide decisions."""
+
+    spectators: comm.Spectators
+    """The observers of every event sent to both players."""
+
+    def __init__(
+        self,
+        players: Pair[interface.Player],
+        comms: Pair[comm.Callback] | None,
+        *,
+        rng: random.Random | None = None,
+        spectators: comm.Spectators | None = None,
+    ) -> None:
         self.players = players
         self.comms = comms
+        self.rng = rng or random.Random()
+        self.spectators = spectators if spectators is not None else comm.Spectators()
+
+    def clone(self, *, rng: random.Random | None = None) -> "State":
+        """Return a copy of the game which can be played independently.
+
+        The communication channels are shared and the copy has no spectators. The random generators are copied,
+        or derived from the given generator so that each player still draws from its own.
+        """
+        if rng is None:
+            players = (self.players[0].clone(), self.players[1].clone())
+            rng = random.Random()
+            rng.setstate(self.rng.getstate())
+        else:
+            players = (
+                self.players[0].clone(rng=random.Random(rng.getrandbits(64))),
+                self.players[1].clone(rng=random.Random(rng.getrandbits(64))),
+            )
+
+        return State(players, self.comms, rng=rng)
 
-    def of_opponent(self) -> Self:
+    @property
+    def zobrist(self) -> int:
+        """Hash of the game state from the point of view of the current player."""
+        return self.players[0].zobrist ^ self.players[1].zobrist ^ interface.zobrist.key("me", self.players[0].id)
+
+    def of_opponent(self) -> "State":
         """Return a reversed state."""
-        return State(self.players[::-1], self.comms[::-1])
+        return State(
+            (self.players[1], self.players[0]),
+            self.comms and (self.comms[1], self.comms[0]),
+            rng=self.rng,
+            spectators=self.spectators,
+        )
 
     @property
     def me(self) -> interface.Player:
@@ -52,8 +130,8 @@ class State:
 
     @property
     def mecomm(self) -> comm.Callback:
-        """The current player's communication channel."""
-        return self.comms[0]
+        """The current player's communication channel, see `comm_of`."""
+        return self.comm_of(self.players[0])
 
     @property
     def opponent(self) -> interface.Player:
@@ -62,38 +140,86 @@ class State:
 
     @property
     def opponentcomm(self) -> comm.Callback:
-        """The opponent's communication channel."""
-        return self.comms[1]
+        """The opponent's communication channel, see `comm_of`."""
+        return self.comm_of(self.players[1])
+
+    def comm_of(self, player: interface.Player) -> comm.Callback:
+        """Return the communication channel of a player.
+
+        Raises RuntimeError if the game is driven by an engine and has no channels.
+        """
+        if self.comms is None:
+            raise RuntimeError("This state has no communication channels.")
+
+        return self.comms[0] if player is self.players[0] else self.comms[1]
 
-    async def send_both(self, event: events.Event) -> None:
-        """Send an event to both players."""
-        await asyncio.gather(self.comms[0](event), self.comms[1](event))
+    def send_me(self, event: events.Event) -> Send:
+        """Send an event to the current player."""
+        return Send((self.players[0],), event)
 
-    async def send_error(self, message: str) -> None:
-        """Send an error to both players."""
-        await self.mecomm(events.ErrorEvent(message=message))
+    def send_opponent(self, event: events.Event) -> Send:
+        """Send an event to the opponent."""
+        return Send((self.players[1],), event)
 
+    def send_both(self, event: events.Event) -> Send:
+        """Send an event to both players.
 
-async def _run_both(callback: typing.Callable[[State], typing.Awaitable[T]], state: State) -> Pair[T]:
+        Hidden fields are only revealed to the event's side, see `events.Event.public`.
+        """
+        return Send(self.players, event)
+
+    def send_error(self, message: str) -> Send:
+        """Send an error to the current player."""
+        return Send((self.players[0],), events.ErrorEvent(message=message))
+
+    def request(self, event: events.RequestEvent[T]) -> Rule[T | None]:
+        """Request a response from the current player."""
+        return (yield Send((self.players[0],), event))
+
+
+def _run_both(callback: typing.Callable[[State], Rule[T]], state: State) -> Rule[Pair[T]]:
     """Run a callback for both players."""
-    return await asyncio.gather(callback(state), callback(state.of_opponent()))
+    return (yield Parallel((callback(state), callback(state.of_opponent()))))
+
+
+async def drive(state: State, rule: Rule[T]) -> T:
+    """Run game rules by awaiting the players' communication channels."""
+    response: typing.Any = None
+
+    while True:
+        try:
+            instruction = rule.send(response)
+        except StopIteration as e:
+            return typing.cast(T, e.value)
+
+        match instruction:
+            case Send(players=(player,)):
+                response = await state.comm_of(player)(instruction.event.project(player.id))
+            case Send():
+                state.spectators.publish(instruction.event)
+                await asyncio.gather(
+                    *(state.comm_of(player)(instruction.event.project(player.id)) for player in instruction.players)
+                )
+                response = None
+            case Parallel():
+                response = tuple(await asyncio.gather(*(drive(state, subrule) for subrule in instruction.rules)))
 
 
 def has_all_characters_dead(state: State) -> int | None:
     """Find out who won."""
-    if not state.me.alive_characters:
+    if not state.me.alive_count:
         return state.me.id
-    if not state.opponent.alive_characters:
+    if not state.opponent.alive_count:
         return state.opponent.id
 
     return None
 
 
-async def choose_cards(state: State) -> None:
+def choose_cards(state: State) -> Rule[None]:
     """Choose cards for both players."""
     cards = state.me.draw_cards(5)
 
-    await state.mecomm(
+    yield state.send_both(
         events.CardDrawEvent(
             side=state.me.id,
             current_amount=state.me.hand.amount,
@@ -102,28 +228,19 @@ async def choose_cards(state: State) -> None:
             cards=to_ids(cards),
         )
     )
-    await state.opponentcomm(
-        events.CardDrawEvent(
-            side=state.me.id,
-            current_amount=state.me.hand.amount,
-            current=None,
-            amount=state.me.hand.amount,
-            cards=None,
-        )
-    )
 
-    discarded_cards = await state.mecomm(events.CardsChangeRequestEvent(possible=to_ids(cards)))
+    discarded_cards = yield from state.request(events.CardsChangeRequestEvent(possible=to_ids(cards)))
     if discarded_cards is None:
         discarded_cards = []
+    elif collections.Counter(discarded_cards) - collections.Counter(to_ids(cards)):
+        yield state.send_error("Invalid cards!")
+        discarded_cards = []
 
-    for card_id in discarded_cards:
-        card = state.me.hand.remove_card(card_id)
-        state.me.deck.cards.append(card)
-
-    state.me.deck.shuffle()
-    drawn_cards = state.me.draw_cards(len(discarded_cards))
+    returned_cards = [state.me.hand.remove_card(card_id) for card_id in discarded_cards]
+    drawn_cards = state.me.deck.reshuffle(returned_cards)
+    state.me.hand.add_cards(drawn_cards)
 
-    await state.mecomm(
+    yield state.send_both(
         events.CardsChangeEvent(
             side=state.me.id,
             current_amount=state.me.hand.amount,
@@ -133,40 +250,33 @@ async def choose_cards(state: State) -> None:
             discarded_cards=discarded_cards,
         )
     )
-    await state.opponentcomm(
-        events.CardsChangeEvent(
-            side=state.me.id,
-            current_amount=state.me.hand.amount,
-            current=None,
-            amount=state.me.hand.amount,
-            drawn_cards=None,
-            discarded_cards=None,
-        )
-    )
 
 
-async def choose_active_character(state: State) -> None:
+def choose_active_character(state: State) -> Rule[None]:
     """Choose an active character for both players."""
-    character = await state.mecomm(
+    character = yield from state.request(
         events.CharacterRequestEvent(
             possible=to_ids(state.me.alive_characters),
             possible_enemy=None,
         )
     )
     if character is None:
-        await state.send_error("No character chosen!")
+        yield state.send_error("No character chosen!")
+        character = state.me.alive_characters[0].id
+    elif character not in to_ids(state.me.alive_characters):
+        yield state.send_error("Invalid character!")
         character = state.me.alive_characters[0].id
 
     state.me.switch_character(character)
 
-    await state.send_both(events.SwitchEvent(side=state.me.id, target=character, previous=None))
+    yield state.send_both(events.SwitchEvent(side=state.me.id, target=character, previous=None))
 
 
-async def roll_dice(state: State) -> None:
+def roll_dice(state: State) -> Rule[None]:
     """Roll the dice for both players."""
     dice = state.me.dice.roll(8)
 
-    await state.mecomm(
+    yield state.send_both(
         events.DiceAddEvent(
             side=state.me.id,
             current_amount=len(dice),
@@ -175,17 +285,17 @@ async def roll_dice(state: State) -> None:
             dice=dice,
         )
     )
-    await state.opponentcomm(
-        events.DiceAddEvent(
-            side=state.me.id,
-            current_amount=len(dice),
-            current=None,
-            amount=len(dice),
-            dice=None,
+
+    rerolled = yield from state.request(
+        events.DiceChangeRequestEvent(
+            possible=dice,
+            recommended=utility.recommend_reroll(state.me),
         )
     )
 
-    rerolled = await state.mecomm(events.DiceChangeRequestEvent(possible=dice))
+    if rerolled and not state.me.dice.has(rerolled):
+        yield state.send_error("Invalid dice!")
+        rerolled = None
 
     if rerolled:
         new = state.me.dice.reroll(rerolled)
@@ -193,33 +303,23 @@ async def roll_dice(state: State) -> None:
         rerolled = []
         new = []
 
-    await state.mecomm(
+    yield state.send_both(
         events.DiceRerollEvent(
             side=state.me.id,
-            current_amount=len(dice),
-            current=dice,
+            current_amount=state.me.dice.amount,
+            current=state.me.dice.dice,
             amount=len(new),
             rerolled_dice=rerolled,
             new_dice=new,
         )
     )
-    await state.opponentcomm(
-        events.DiceRerollEvent(
-            side=state.me.id,
-            current_amount=len(dice),
-            current=None,
-            amount=len(new),
-            rerolled_dice=None,
-            new_dice=None,
-        )
-    )
 
 
-async def draw_cards(state: State) -> None:
+def draw_cards(state: State) -> Rule[None]:
     """Draw 2 cards."""
     cards = state.me.draw_cards(2)
 
-    await state.mecomm(
+    yield state.send_both(
         events.CardDrawEvent(
             side=state.me.id,
             current_amount=state.me.hand.amount,
@@ -228,39 +328,30 @@ async def draw_cards(state: State) -> None:
             cards=to_ids(cards),
         )
     )
-    await state.opponentcomm(
-        events.CardDrawEvent(
-            side=state.me.id,
-            current_amount=state.me.hand.amount,
-            current=None,
-            amount=state.me.hand.amount,
-            cards=None,
-        )
-    )
 
 
-async def run_preparation(state: State) -> None:
+def run_preparation(state: State) -> Rule[None]:
     """Prepare the game."""
-    await _run_both(choose_cards, state)
-    await _run_both(choose_active_character, state)
+    yield from _run_both(choose_cards, state)
+    yield from _run_both(choose_active_character, state)
 
 
-async def run_round_start(state: State) -> None:
+def run_round_start(state: State) -> Rule[None]:
     """Run the start of a round."""
-    await state.send_both(events.StartRoundEvent(side=state.me.id))
+    yield state.send_both(events.StartRoundEvent(side=state.me.id))
 
 
-async def run_round_end(state: State) -> None:
+def run_round_end(state: State) -> Rule[None]:
     """Run the end of a round."""
-    await state.send_both(events.EndRoundEvent(side=state.me.id))
+    yield state.send_both(events.EndRoundEvent(side=state.me.id))
 
 
-async def execute_effect(
+def execute_effect(
     state: State,
     effect: models.Effect,
     *,
     source: models.Talent | models.CardStatus | models.Summon | None = None,
-) -> None:
+) -> Rule[None]:
     """Execute an effect."""
     assert state.opponent.active_character is not None
     assert state.me.active_character is not None
@@ -268,16 +359,16 @@ async def execute_effect(
     match effect:
         case models.AttackEffect():
             if effect.element:
-                await state.send_error("Elements not implemented!")
+                yield state.send_error("Elements not implemented!")
             if effect.piercing:
-                await state.send_error("Piercing not implemented!")
+                yield state.send_error("Piercing not implemented!")
             if effect.target != models.SidelineTarget.ACTIVE_CHARACTER:
-                await state.send_error("Target not implemented!")
+                yield state.send_error("Target not implemented!")
 
             state.opponent.active_character.change_health(-effect.damage)
             match source:
                 case models.Talent():
-                    await state.send_both(
+                    yield state.send_both(
                         events.TalentEvent(
                             side=state.me.id,
                             target=state.opponent.active_character.id,
@@ -289,8 +380,8 @@ async def execute_effect(
                         )
                     )
                 case _:
-                    await state.send_error(f"Unknown source for attack effect: {source!r}")
-                    await state.send_both(
+                    yield state.send_error(f"Unknown source for attack effect: {source!r}")
+                    yield state.send_both(
                         events.DamageEvent(
                             side=state.me.id,
                             target=state.opponent.active_character.id,
@@ -300,14 +391,14 @@ async def execute_effect(
                         )
                     )
         case _:
-            await state.send_error(f"Unknown effect: {effect!r}")
+            yield state.send_error(f"Unknown effect: {effect!r}")
 
 
-async def run_attack_action(state: State) -> typing.Literal[enums.Action.ATTACK] | None:
+def run_attack_action(state: State) -> Rule[typing.Literal[enums.Action.ATTACK] | None]:
     """Run an attack action."""
     assert state.me.active_character is not None
 
-    talent_id = await state.mecomm(
+    talent_id = yield from state.request(
         events.TalentRequestEvent(
             possible=to_ids(state.me.active_character.talents),
         )
@@ -317,23 +408,24 @@ async def run_attack_action(state: State) -> typing.Literal[enums.Action.ATTACK]
 
     talent = state.me.active_character.get_talent(talent_id)
     if talent is None:
-        await state.send_error("Invalid talent!")
+        yield state.send_error("Invalid talent!")
         return
 
-    dice = await state.mecomm(
+    cost = utility.talent_cost(talent)
+    dice = yield from state.request(
         events.DiceRequestEvent(
             cost=talent.cost,
-            recommended=utility.recommend_dice(state.me.dice.dice, talent.cost),
+            recommended=utility.recommend_dice(state.me.dice, cost),
         )
     )
 
-    if dice is None or not utility.is_enough_dice(dice, talent.cost):
-        await state.send_error("Invalid dice!")
+    if dice is None or not state.me.dice.has(dice) or not utility.is_enough_dice(dice, cost):
+        yield state.send_error("Invalid dice!")
         return
 
     state.me.dice.remove(dice)
 
-    await state.mecomm(
+    yield state.send_both(
         events.DiceRemoveEvent(
             side=state.me.id,
             current_amount=len(state.me.dice.dice),
@@ -342,44 +434,35 @@ async def run_attack_action(state: State) -> typing.Literal[enums.Action.ATTACK]
             dice=dice,
         )
     )
-    await state.opponentcomm(
-        events.DiceRemoveEvent(
-            side=state.me.id,
-            current_amount=len(state.me.dice.dice),
-            current=None,
-            amount=len(dice),
-            dice=None,
-        )
-    )
 
     for effect in talent.effects:
-        await execute_effect(state, effect, source=talent)
+        yield from execute_effect(state, effect, source=talent)
 
     return enums.Action.ATTACK
 
 
-async def run_card_action(state: State) -> None:
+def run_card_action(state: State) -> Rule[None]:
     """Run a card action."""
-    await state.send_error("Not implemented yet!")
+    yield state.send_error("Not implemented yet!")
 
 
-async def run_tune_action(state: State) -> None:
+def run_tune_action(state: State) -> Rule[None]:
     """Run a tune action."""
-    await state.send_error("Not implemented yet!")
+    yield state.send_error("Not implemented yet!")
 
 
-async def run_switch_action(state: State) -> None:
+def run_switch_action(state: State) -> Rule[None]:
     """Run a switch action."""
-    await state.send_error("Not implemented yet!")
+    yield state.send_error("Not implemented yet!")
 
 
-async def run_turn(state: State) -> typing.Literal[enums.Action.CONCEDE] | None:
+def run_turn(state: State) -> Rule[typing.Literal[enums.Action.CONCEDE] | None]:
     """Run a turn."""
     assert state.me.active_character
-    await state.send_both(events.StartTurnEvent(side=state.me.id))
+    yield state.send_both(events.StartTurnEvent(side=state.me.id))
 
     while True:
-        action = await state.mecomm(events.ActionRequestEvent())
+        action = yield from state.request(events.ActionRequestEvent())
         match action:
             case enums.Action.END:
                 state.me.declared_end = True
@@ -387,47 +470,53 @@ async def run_turn(state: State) -> typing.Literal[enums.Action.CONCEDE] | None:
             case enums.Action.CONCEDE:
                 return enums.Action.CONCEDE
             case enums.Action.ATTACK:
-                r = await run_attack_action(state)
+                r = yield from run_attack_action(state)
                 if r == enums.Action.ATTACK:
                     break
             case enums.Action.CARD:
-                await run_card_action(state)
+                yield from run_card_action(state)
             case enums.Action.TUNE:
-                await run_tune_action(state)
+                yield from run_tune_action(state)
             case enums.Action.SWITCH:
-                await run_switch_action(state)
+                yield from run_switch_action(state)
             case _:
-                await state.send_error("Invalid action!")
+                yield state.send_error("Invalid action!")
                 continue
 
         if has_all_characters_dead(state):
             break
 
-    await state.send_both(events.EndTurnEvent(side=state.me.id))
+    yield state.send_both(events.EndTurnEvent(side=state.me.id))
 
     return None
 
 
-async def main(state: State) -> None:
-    """Run a game between two players."""
-    await run_preparation(state)
+def play(state: State) -> Rule[None]:
+    """Run the rules of a game between two players."""
+    yield from run_preparation(state)
 
     # choose who starts
-    if random.random() < 0.5:
+    if state.rng.random() < 0.5:
         state = state.of_opponent()
 
-    round_number = 1
+    yield from play_rounds(state)
+
 
+def play_rounds(state: State, round_number: int = 1) -> Rule[None]:
+    """Run the rounds of a game from the start of a round.
+
+    The opponent of the current player starts the round.
+    """
     while True:
         state.me.declared_end = False
         state.opponent.declared_end = False
 
-        await run_round_start(state.of_opponent())
+        yield from run_round_start(state.of_opponent())
 
         if round_number > 1:
-            await _run_both(draw_cards, state)
+            yield from _run_both(draw_cards, state)
 
-        await _run_both(roll_dice, state)
+        yield from _run_both(roll_dice, state)
 
         while True:
             if state.opponent.declared_end:
@@ -436,24 +525,37 @@ async def main(state: State) -> None:
             else:
                 state = state.of_opponent()
 
-            result = await run_turn(state)
+            result = yield from run_turn(state)
             if result == enums.Action.CONCEDE:
-                await state.send_both(events.ConcededEvent(side=state.me.id))
+                yield state.send_both(events.ConcededEvent(side=state.me.id))
                 return
 
-            assert state.opponent.active_character
-            if state.opponent.active_character.dead:
-                await choose_active_character(state.of_opponent())
-
             loser = has_all_characters_dead(state)
             if loser is not None:
-                await state.send_both(events.LostEvent(side=loser))
+                yield state.send_both(events.LostEvent(side=loser))
                 return
 
-        await run_round_end(state)
+            assert state.opponent.active_character
+            if state.opponent.active_character.dead:
+                yield from choose_active_character(state.of_opponent())
+
+        yield from run_round_end(state)
         round_number += 1
 
 
-async def start(players: Pair[interface.Player], comms: Pair[comm.Callback]) -> None:
+async def main(state: State) -> None:
+    """Run a game between two players."""
+    try:
+        await drive(state, play(state))
+    finally:
+        state.spectators.close()
+
+
+async def start(
+    players: Pair[interface.Player],
+    comms: Pair[comm.Callback],
+    *,
+    rng: random.Random | None = None,
+) -> None:
     """Start a game between two players."""
-    await main(State(players, comms))
+    await main(State(players, comms, rng=rng))
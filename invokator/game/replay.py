@@ -0,0 +1,485 @@
+"""Game recordings and replays.
+
+A log is an append-only stream of records, each a varint length followed by the record:
+
+- the first record is the setup of the game as compact JSON: the seed and every player's characters and deck
+- an event record is a 0 byte, the varint id of the receiving player and the event encoded by `wire.encode_event`
+- a response record is a 1 byte, the varint id of the answering player
+  and the response encoded by `wire.encode_response`
+
+Events are recorded in their projection for the receiving player, so a log can be replayed from either side.
+Keyframes taken at the start of every round can be stored next to a log to seek in it, see `Replay`.
+"""
+import json
+import random
+import struct
+import typing
+
+from invokator import interface, models
+
+from . import engine, gameloop
+from .comm import commtypes, events, wire
+
+__all__ = [
+    "GameLog",
+    "GameSetup",
+    "Keyframe",
+    "Observer",
+    "PlayerSetup",
+    "Recorder",
+    "Replay",
+    "read_keyframes",
+    "read_log",
+    "replay",
+]
+
+T = typing.TypeVar("T")
+
+Observer = typing.Callable[[int, events.BaseEvent[typing.Any]], None]
+"""Receives every replayed event along with the id of its recipient."""
+
+EVENT_RECORD = 0
+RESPONSE_RECORD = 1
+
+_MISSING: typing.Any = object()
+
+_RNG_STATE = struct.Struct("<625I")
+"""The internal state of a Mersenne Twister generator."""
+
+
+def _write_record(buffer: bytearray, record: bytes) -> None:
+    """Append a length-prefixed record."""
+    wire.write_varint(buffer, len(record))
+    buffer += record
+
+
+def _read_records(data: bytes) -> list[bytes]:
+    """Read length-prefixed records up to the last complete one."""
+    records: list[bytes] = []
+    position = 0
+    while position < len(data):
+        try:
+            length, start = wire.read_varint(data, position)
+        except IndexError:
+            break
+
+        position = start + length
+        if position > len(data):
+            break
+
+        records.append(data[start:position])
+
+    return records
+
+
+class PlayerSetup(typing.NamedTuple):
+    """The starting characters and deck of a player."""
+
+    id: int
+    character_ids: tuple[int, ...]
+    deck: tuple[int, ...]
+    """The ids of the cards in the deck in their initial order."""
+
+    @classmethod
+    def of(
+        cls,
+        id: int,
+        character_ids: typing.Collection[int],
+        deck: typing.Iterable[models.Card] | None = None,
+    ) -> "PlayerSetup":
+        """Describe a player created by `runner.create_player`."""
+        cards = models.CARDS if deck is None else deck
+        return cls(id, tuple(character_ids), tuple(card.id for card in cards))
+
+    def create(self, rng: random.Random) -> interface.Player:
+        """Create the player like `runner.create_player` would."""
+        characters = [
+            interface.Character.parse_obj(character)
+            for character in models.CHARACTERS
+            if character.id in self.character_ids
+        ]
+        cards = {card.id: card for card in models.CARDS}
+        return interface.Player(id=self.id, characters=characters, deck=[cards[id] for id in self.deck], rng=rng)
+
+
+class GameSetup(typing.NamedTuple):
+    """Everything needed to recreate the starting state of a game."""
+
+    seed: int
+    """The seed every random generator of the game is derived from."""
+
+    players: gameloop.Pair[PlayerSetup]
+
+    def create(self) -> tuple[gameloop.Pair[interface.Player], random.Random]:
+        """Create the players and the game-wide random generator.
+
+        Every player gets its own generator derived from the seed,
+        so the game is reproducible no matter how the players' coroutines interleave.
+        """
+        rng = random.Random(self.seed)
+        players = (
+            self.players[0].create(random.Random(rng.getrandbits(64))),
+            self.players[1].create(random.Random(rng.getrandbits(64))),
+        )
+        return players, rng
+
+    def to_bytes(self) -> bytes:
+        """Encode the setup into compact UTF-8 JSON."""
+        return json.dumps([self.seed, self.players], separators=(",", ":")).encode()
+
+    @classmethod
+    def from_bytes(cls, data: bytes) -> "GameSetup":
+        """Decode a setup from compact UTF-8 JSON."""
+        seed, players = json.loads(data)
+        first, second = (PlayerSetup(id, tuple(character_ids), tuple(deck)) for id, character_ids, deck in players)
+        return cls(seed, (first, second))
+
+
+class Recorder:
+    """Appends the events and responses of a game to a log."""
+
+    file: typing.BinaryIO
+    """The log, written to as soon as an event or response is known."""
+
+    setup: GameSetup
+
+    def __init__(self, file: typing.BinaryIO, setup: GameSetup) -> None:
+        self.file = file
+        self.setup = setup
+        self._write(setup.to_bytes())
+
+    def _write(self, record: bytes) -> None:
+        """Append a length-prefixed record."""
+        buffer = bytearray()
+        _write_record(buffer, record)
+        self.file.write(buffer)
+
+    def _write_tagged(self, kind: int, player_id: int, data: bytes) -> None:
+        """Append a record of a player."""
+        record = bytearray((kind,))
+        wire.write_varint(record, player_id)
+        record += data
+        self._write(bytes(record))
+
+    def event(self, player_id: int, event: events.BaseEvent[typing.Any]) -> None:
+        """Record an event sent to a player."""
+        self._write_tagged(EVENT_RECORD, player_id, wire.encode_event(event))
+
+    def response(self, player_id: int, request: events.BaseEvent[typing.Any], response: typing.Any) -> None:
+        """Record the response of a player to a request."""
+        self._write_tagged(RESPONSE_RECORD, player_id, wire.encode_response(type(request), response))
+
+    def channel(self, player_id: int, callback: commtypes.Callback) -> commtypes.Callback:
+        """Wrap the communication channel of a player."""
+
+        async def record(event: events.BaseEvent[T]) -> T | None:
+            self.event(player_id, event)
+            response = await callback(event)
+            if isinstance(event, events.RequestEvent):
+                self.response(player_id, event, response)
+
+            return response
+
+        return record
+
+    def responder(self, player_id: int, responder: engine.Responder) -> engine.Responder:
+        """Wrap the responder of a player."""
+
+        def record(event: events.BaseEvent[typing.Any]) -> typing.Any:
+            self.event(player_id, event)
+            response = responder(event)
+            if isinstance(event, events.RequestEvent):
+                self.response(player_id, event, response)
+
+            return response
+
+        return record
+
+
+class GameLog(typing.NamedTuple):
+    """A decoded log."""
+
+    setup: GameSetup
+
+    deliveries: list[engine.Delivery]
+    """Every recorded event in the order it was sent."""
+
+    responses: dict[int, list[typing.Any]]
+    """The responses of every player in the order they were given."""
+
+
+def read_log(data: bytes | typing.BinaryIO) -> GameLog:
+    """Decode a log, a log cut short by a crash is read up to its last complete record."""
+    if not isinstance(data, bytes):
+        data = data.read()
+
+    records = _read_records(data)
+    if not records:
+        raise ValueError("The log has no setup.")
+
+    setup = GameSetup.from_bytes(records[0])
+    deliveries: list[engine.Delivery] = []
+    responses: dict[int, list[typing.Any]] = {player.id: [] for player in setup.players}
+    requests: dict[int, type[events.BaseEvent[typing.Any]]] = {}
+
+    for record in records[1:]:
+        player_id, position = wire.read_varint(record, 1)
+        if record[0] == EVENT_RECORD:
+            event = typing.cast(events.BaseEvent[typing.Any], wire.decode_event(record[position:]))
+            deliveries.append((player_id, event))
+            requests[player_id] = type(event)
+        elif record[0] == RESPONSE_RECORD:
+            responses[player_id].append(wire.decode_response(requests[player_id], record[position:]))
+        else:
+            raise ValueError(f"Unknown record kind {record[0]}.")
+
+    return GameLog(setup, deliveries, responses)
+
+
+def _drive(
+    game: engine.Engine,
+    log: GameLog,
+    positions: dict[int, int],
+    *,
+    turns: int = 0,
+    until: int | None = None,
+    observer: Observer | None = None,
+    verify: bool = False,
+) -> engine.Engine:
+    """Feed the recorded responses after the given positions to a new engine.
+
+    Stops at the end of the log, or at the first request once `until` turns have started.
+    """
+    requests: dict[int, list[events.BaseEvent[typing.Any]]] = {player_id: [] for player_id in log.responses}
+    if verify:
+        for recipient, event in log.deliveries:
+            if isinstance(event, events.RequestEvent):
+                requests[recipient].append(event)
+
+    counted = log.setup.players[0].id
+
+    delivered, request = game.start()
+    while True:
+        for player_id, event in delivered:
+            if observer is not None:
+                observer(player_id, event)
+            if player_id == counted and isinstance(event, events.StartTurnEvent):
+                turns += 1
+
+        if request is None or (until is not None and turns >= until):
+            return game
+
+        player_id, event = request
+        if observer is not None:
+            observer(player_id, event)
+
+        position = positions[player_id]
+        recorded = requests[player_id][position] if position < len(requests[player_id]) else None
+        if verify and recorded is not None and wire.encode_event(recorded) != wire.encode_event(event):
+            raise ValueError(f"The replay of player {player_id} diverged at {event!r}, recorded {recorded!r}.")
+
+        if position >= len(log.responses[player_id]):
+            return game
+
+        positions[player_id] = position + 1
+        delivered, request = game.step(log.responses[player_id][position])
+
+
+def replay(
+    log: GameLog | bytes | typing.BinaryIO,
+    *,
+    observer: Observer | None = None,
+    verify: bool = True,
+) -> engine.Engine:
+    """Re-execute a recorded game with the synchronous engine.
+
+    The recorded responses are fed back to the rules, the game stops early when they run out.
+    Every event of the replay is passed to the observer along with the id of its recipient.
+    If verify is set, every request is checked against the recorded one and a mismatch raises a ValueError.
+    The order of the notifications of parallel rules depends on the driver, so they are not checked.
+    """
+    if not isinstance(log, GameLog):
+        log = read_log(log)
+
+    players, rng = log.setup.create()
+    positions = {player_id: 0 for player_id in log.responses}
+    return _drive(engine.Engine(players, rng=rng), log, positions, observer=observer, verify=verify)
+
+
+class Keyframe(typing.NamedTuple):
+    """A snapshot of a replayed game taken when a round starts.
+
+    Players are stored as `interface.CompactPlayer`, which holds everything the rules change.
+    """
+
+    round: int
+    """The number of the round, starting at 1."""
+
+    turns: int
+    """The amount of turns started before the round."""
+
+    side: int
+    """The side of the round's `StartRoundEvent`."""
+
+    positions: tuple[int, int]
+    """The amount of responses given by every player before the round, in setup order."""
+
+    players: gameloop.Pair[interface.CompactPlayer]
+    """The players in setup order."""
+
+    rng_states: tuple[typing.Any, typing.Any, typing.Any]
+    """The states of the game's generator and of both players' generators."""
+
+    @classmethod
+    def take(cls, state: gameloop.State, round: int, turns: int, side: int, positions: dict[int, int]) -> "Keyframe":
+        """Take a snapshot of an engine's state, whose players are in setup order."""
+        first, second = state.players
+        return cls(
+            round,
+            turns,
+            side,
+            (positions[first.id], positions[second.id]),
+            (interface.CompactPlayer.from_player(first), interface.CompactPlayer.from_player(second)),
+            (state.rng.getstate(), first.rng.getstate(), second.rng.getstate()),
+        )
+
+    def restore(self) -> engine.Engine:
+        """Create an engine which resumes the game at the start of the round."""
+        generators: list[random.Random] = []
+        for rng_state in self.rng_states:
+            rng = random.Random()
+            rng.setstate(rng_state)
+            generators.append(rng)
+
+        players = (self.players[0].to_player(rng=generators[1]), self.players[1].to_player(rng=generators[2]))
+
+        def rules(state: gameloop.State) -> gameloop.Rule[None]:
+            # the opponent of the current player starts the round
+            return gameloop.play_rounds(state if state.opponent.id == self.side else state.of_opponent(), self.round)
+
+        return engine.Engine(players, rng=generators[0], rules=rules)
+
+    def to_bytes(self) -> bytes:
+        """Encode the keyframe."""
+        header = [self.round, self.turns, self.side, self.positions, [[rng[0], rng[2]] for rng in self.rng_states]]
+        buffer = bytearray()
+        _write_record(buffer, json.dumps(header, separators=(",", ":")).encode())
+        for player in self.players:
+            _write_record(buffer, player.to_bytes())
+        for rng in self.rng_states:
+            buffer += _RNG_STATE.pack(*rng[1])
+
+        return bytes(buffer)
+
+    @classmethod
+    def from_bytes(cls, data: bytes) -> "Keyframe":
+        """Decode a keyframe."""
+        header, first, second = _read_records(data)[:3]
+        round, turns, side, positions, generators = json.loads(header)
+
+        position = len(data) - 3 * _RNG_STATE.size
+        rng_states: list[typing.Any] = []
+        for version, gauss in generators:
+            rng_states.append((version, _RNG_STATE.unpack_from(data, position), gauss))
+            position += _RNG_STATE.size
+
+        return cls(
+            round,
+            turns,
+            side,
+            (positions[0], positions[1]),
+            (interface.CompactPlayer.from_bytes(first), interface.CompactPlayer.from_bytes(second)),
+            (rng_states[0], rng_states[1], rng_states[2]),
+        )
+
+
+def _keyframing(
+    state: gameloop.State,
+    positions: dict[int, int],
+    keyframes: list[Keyframe],
+) -> gameloop.Rule[None]:
+    """Play a game, taking a keyframe whenever a round starts."""
+    rules = gameloop.play(state)
+    rounds = turns = 0
+    response: typing.Any = None
+
+    while True:
+        try:
+            instruction = rules.send(response)
+        except StopIteration:
+            return
+
+        if isinstance(instruction, gameloop.Send):
+            if isinstance(instruction.event, events.StartTurnEvent):
+                turns += 1
+            elif isinstance(instruction.event, events.StartRoundEvent):
+                rounds += 1
+                keyframes.append(Keyframe.take(state, rounds, turns, instruction.event.side, positions))
+
+        response = yield instruction
+
+
+class Replay:
+    """A recorded game which can be seeked to any turn.
+
+    Seeking restores the closest keyframe before the turn and replays only the responses after it.
+    """
+
+    log: GameLog
+
+    keyframes: list[Keyframe]
+    """Snapshots taken at the start of every round."""
+
+    def __init__(
+        self,
+        log: GameLog | bytes | typing.BinaryIO,
+        keyframes: typing.Sequence[Keyframe] | None = None,
+    ) -> None:
+        self.log = log if isinstance(log, GameLog) else read_log(log)
+        self.keyframes = list(keyframes) if keyframes is not None else self._index()
+
+    def _index(self) -> list[Keyframe]:
+        """Replay the whole game once to take its keyframes."""
+        keyframes: list[Keyframe] = []
+        positions = {player_id: 0 for player_id in self.log.responses}
+        players, rng = self.log.setup.create()
+
+        game = engine.Engine(players, rng=rng, rules=lambda state: _keyframing(state, positions, keyframes))
+        _drive(game, self.log, positions)
+        return keyframes
+
+    def seek(self, turn: int) -> engine.Engine:
+        """Return an engine paused at the first request of a turn, turns start at 1.
+
+        The engine is paused at the end of the log if the turn is never reached.
+        """
+        keyframe = None
+        for candidate in self.keyframes:
+            if candidate.turns >= turn:
+                break
+
+            keyframe = candidate
+
+        if keyframe is None:
+            players, rng = self.log.setup.create()
+            return _drive(engine.Engine(players, rng=rng), self.log, {id: 0 for id in self.log.responses}, until=turn)
+
+        ids = [player.id for player in self.log.setup.players]
+        positions = dict(zip(ids, keyframe.positions))
+        return _drive(keyframe.restore(), self.log, positions, turns=keyframe.turns, until=turn)
+
+    def write_keyframes(self, file: typing.BinaryIO) -> None:
+        """Write the keyframes to be stored next to the log."""
+        buffer = bytearray()
+        for keyframe in self.keyframes:
+            _write_record(buffer, keyframe.to_bytes())
+
+        file.write(buffer)
+
+
+def read_keyframes(data: bytes | typing.BinaryIO) -> list[Keyframe]:
+    """Decode keyframes written by `Replay.write_keyframes`."""
+    if not isinstance(data, bytes):
+        data = data.read()
+
+    return [Keyframe.from_bytes(record) for record in _read_records(data)]
@@ -0,0 +1,315 @@
+"""Headless game runner."""
+import asyncio
+import random
+import time
+import typing
+
+from invokator import interface, models
+
+from . import archive, bot, comm, engine, gameloop, replay
+from .comm import events
+
+__all__ = ["GameResult", "Report", "create_player", "play_game", "play_games", "run_game", "run_games"]
+
+T = typing.TypeVar("T")
+
+DEFAULT_CHARACTER_IDS = (1301, 1103, 1501)
+
+
+class GameResult(typing.NamedTuple):
+    """The result of a finished game."""
+
+    seed: int
+    """The seed the game was started with."""
+
+    winner: int | None
+    """The id of the winning player."""
+
+    loser: int | None
+    """The id of the losing player."""
+
+    conceded: bool
+    """Whether the game has ended because a player has conceded."""
+
+    rounds: int
+    """The amount of rounds played."""
+
+    turns: int
+    """The amount of turns played by both players."""
+
+    duration: float
+    """The wall time of the game in seconds."""
+
+
+class Report(typing.NamedTuple):
+    """Throughput statistics of a batch of games."""
+
+    games: int
+    """The amount of games played."""
+
+    turns: int
+    """The amount of turns played."""
+
+    elapsed: float
+    """The wall time of the whole batch in seconds."""
+
+    p50: float
+    """The median game duration in seconds."""
+
+    p99: float
+    """The 99th percentile game duration in seconds."""
+
+    @classmethod
+    def from_results(cls, results: typing.Sequence[GameResult], elapsed: float) -> "Report":
+        """Summarize game results."""
+        durations = sorted(result.duration for result in results)
+        return cls(
+            games=len(results),
+            turns=sum(result.turns for result in results),
+            elapsed=elapsed,
+            p50=_percentile(durations, 0.50),
+            p99=_percentile(durations, 0.99),
+        )
+
+    @property
+    def games_per_second(self) -> float:
+        """The amount of games finished per second."""
+        return self.games / self.elapsed if self.elapsed else 0.0
+
+    @property
+    def turns_per_second(self) -> float:
+        """The amount of turns played per second."""
+        return self.turns / self.elapsed if self.elapsed else 0.0
+
+    def __str__(self) -> str:
+        return (
+            f"{self.games} games in {self.elapsed:.2f}s: "
+            f"{self.games_per_second:.1f} games/s, {self.turns_per_second:.1f} turns/s, "
+            f"p50 {self.p50 * 1000:.2f}ms, p99 {self.p99 * 1000:.2f}ms"
+        )
+
+
+def _percentile(ordered: typing.Sequence[float], fraction: float) -> float:
+    """Return a nearest-rank percentile of sorted values."""
+    if not ordered:
+        return 0.0
+
+    return ordered[min(len(ordered) - 1, int(fraction * len(ordered)))]
+
+
+def create_player(
+    id: int,
+    character_ids: typing.Collection[int] = DEFAULT_CHARACTER_IDS,
+    deck: typing.Iterable[models.Card] | None = None,
+    *,
+    rng: random.Random | None = None,
+) -> interface.Player:
+    """Create a player with the given characters and deck."""
+    characters = [
+        interface.Character.parse_obj(character) for character in models.CHARACTERS if character.id in character_ids
+    ]
+    cards = list(models.CARDS if deck is None else deck)
+    return interface.Player(id=id, characters=characters, deck=cards, rng=rng)
+
+
+class _Tracker:
+    """Bot wrapper which records the progress of a game."""
+
+    wrapped: bot.RandomBot
+
+    rounds: int
+    turns: int
+    loser: int | None
+    conceded: bool
+
+    def __init__(self, wrapped: bot.RandomBot) -> None:
+        self.wrapped = wrapped
+
+        self.rounds = 0
+        self.turns = 0
+        self.loser = None
+        self.conceded = False
+
+    def observe(self, event: events.BaseEvent[typing.Any]) -> None:
+        """Record the progress made by an event."""
+        match event:
+            case events.StartRoundEvent():
+                self.rounds += 1
+            case events.StartTurnEvent():
+                self.turns += 1
+            case events.ConcededEvent():
+                self.loser = event.side
+                self.conceded = True
+            case events.LostEvent():
+                self.loser = event.side
+            case _:
+                pass
+
+    def respond(self, event: events.BaseEvent[typing.Any]) -> typing.Any:
+        """Return the bot's response to an event."""
+        self.observe(event)
+        return self.wrapped.respond(event)
+
+    async def __call__(self, event: events.BaseEvent[T]) -> T | None:
+        """Send an event."""
+        return self.respond(event)
+
+    def result(self, seed: int, players: gameloop.Pair[interface.Player], duration: float) -> GameResult:
+        """Return the result of the tracked game."""
+        winner = None
+        if self.loser is not None:
+            winner = next(player.id for player in players if player.id != self.loser)
+
+        return GameResult(
+            seed=seed,
+            winner=winner,
+            loser=self.loser,
+            conceded=self.conceded,
+            rounds=self.rounds,
+            turns=self.turns,
+            duration=duration,
+        )
+
+
+def _create_game(
+    seed: int,
+    character_ids: gameloop.Pair[typing.Collection[int]] | None,
+) -> tuple[replay.GameSetup, gameloop.Pair[interface.Player], tuple[_Tracker, bot.RandomBot], random.Random]:
+    """Create the players and bots of a game.
+
+    The bots' generators are derived from the seed separately from the game's,
+    so the game can be replayed from its setup alone.
+    """
+    character_ids = character_ids or (DEFAULT_CHARACTER_IDS, DEFAULT_CHARACTER_IDS)
+    setup = replay.GameSetup(
+        seed,
+        (replay.PlayerSetup.of(1, character_ids[0]), replay.PlayerSetup.of(2, character_ids[1])),
+    )
+    players, rng = setup.create()
+
+    bots_rng = random.Random(f"bots-{seed}")
+    bots = (
+        _Tracker(bot.RandomBot(1, rng=random.Random(bots_rng.getrandbits(64)))),
+        bot.RandomBot(2, rng=random.Random(bots_rng.getrandbits(64))),
+    )
+    return setup, players, bots, rng
+
+
+def _observed(player_id: int, callback: comm.Callback, observer: replay.Observer) -> comm.Callback:
+    """Show every event sent through a channel to an observer."""
+
+    async def deliver(event: events.BaseEvent[T]) -> T | None:
+        observer(player_id, event)
+        return await callback(event)
+
+    return deliver
+
+
+def _observed_responder(player_id: int, responder: engine.Responder, observer: replay.Observer) -> engine.Responder:
+    """Show every event sent to a responder to an observer."""
+
+    def deliver(event: events.BaseEvent[typing.Any]) -> typing.Any:
+        observer(player_id, event)
+        return responder(event)
+
+    return deliver
+
+
+async def run_game(
+    seed: int,
+    *,
+    character_ids: gameloop.Pair[typing.Collection[int]] | None = None,
+    log: typing.BinaryIO | None = None,
+    writer: archive.ArchiveWriter | None = None,
+) -> GameResult:
+    """Run a single game between two random bots.
+
+    If a log is given, the game is recorded into it, see `replay.Recorder`.
+    If a writer is given, the finished game is added to its archive.
+    """
+    setup, players, bots, rng = _create_game(seed, character_ids)
+
+    comms: gameloop.Pair[comm.Callback] = bots
+    if log is not None:
+        recorder = replay.Recorder(log, setup)
+        comms = (recorder.channel(players[0].id, comms[0]), recorder.channel(players[1].id, comms[1]))
+
+    game = None
+    if writer is not None:
+        game = writer.game(setup)
+        comms = (_observed(players[0].id, comms[0], game.observe), _observed(players[1].id, comms[1], game.observe))
+
+    start = time.perf_counter()
+    await gameloop.start(players, comms, rng=rng)
+    duration = time.perf_counter() - start
+
+    if game is not None:
+        game.finish()
+
+    return bots[0].result(seed, players, duration)
+
+
+def play_game(
+    seed: int,
+    *,
+    character_ids: gameloop.Pair[typing.Collection[int]] | None = None,
+    log: typing.BinaryIO | None = None,
+    writer: archive.ArchiveWriter | None = None,
+) -> GameResult:
+    """Play a single game between two random bots with the synchronous engine.
+
+    The result is the same as the one of `run_game` with the same seed.
+    """
+    setup, players, bots, rng = _create_game(seed, character_ids)
+
+    responders: dict[int, engine.Responder] = {players[0].id: bots[0].respond, players[1].id: bots[1].respond}
+    if log is not None:
+        recorder = replay.Recorder(log, setup)
+        responders = {id: recorder.responder(id, responder) for id, responder in responders.items()}
+
+    game = None
+    if writer is not None:
+        game = writer.game(setup)
+        responders = {id: _observed_responder(id, responder, game.observe) for id, responder in responders.items()}
+
+    start = time.perf_counter()
+    engine.Engine(players, rng=rng).run(responders)
+    duration = time.perf_counter() - start
+
+    if game is not None:
+        game.finish()
+
+    return bots[0].result(seed, players, duration)
+
+
+def play_games(amount: int, *, seed: int = 0, writer: archive.ArchiveWriter | None = None) -> list[GameResult]:
+    """Play many games one after another with the synchronous engine.
+
+    Games are seeded with consecutive seeds starting at `seed`.
+    """
+    return [play_game(seed + index, writer=writer) for index in range(amount)]
+
+
+async def run_games(
+    amount: int,
+    *,
+    seed: int = 0,
+    concurrency: int | None = None,
+    writer: archive.ArchiveWriter | None = None,
+) -> list[GameResult]:
+    """Run many games concurrently in the current event loop.
+
+    Games are seeded with consecutive seeds starting at `seed`.
+    If concurrency is set, at most that many games are live at once.
+    Finished games are added to the writer's archive in the order they finish.
+    """
+    if concurrency is None:
+        return await asyncio.gather(*(run_game(seed + index, writer=writer) for index in range(amount)))
+
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def limited(game_seed: int) -> GameResult:
+        async with semaphore:
+            return await run_game(game_seed, writer=writer)
+
+    return await asyncio.gather(*(limited(seed + index) for index in range(amount)))
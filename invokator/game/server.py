@@ -0,0 +1,446 @@
+"""Network server hosting many games.
+
+Every message is a frame of a 4 byte big-endian length followed by the payload:
+
+1. The client sends a hello with a JSON list of up to three distinct character ids, empty for the defaults.
+   The server closes the connection after an invalid hello.
+2. The server pairs clients in the order they connect and starts a game for every pair.
+3. The server sends frames of events encoded by `wire.encode_frame`,
+   when the last event is a request the client answers with `wire.encode_response`.
+4. The server closes the connection when the game ends.
+
+A spectator sends a hello with a JSON object `{"spectate": game}` instead, where games are numbered
+from 0 in the order they start. It receives a frame with the public projection of every event sent
+to both players until the game ends, see `comm.Spectators`. Only live games and the next game to start
+can be watched, the server closes the connection of any other spectator.
+
+Slow clients are limited by a timeout per event and a clock per player, see `comm.TimedChannel`,
+and a client sending a frame larger than `max_frame` is disconnected.
+Games can be recorded into a directory of logs named after their seeds, see `replay.Recorder`.
+"""
+import asyncio
+import contextlib
+import json
+import logging
+import pathlib
+import random
+import struct
+import typing
+
+from invokator import models
+
+from . import comm, gameloop, replay, runner
+from .comm import events, wire
+
+__all__ = ["MAX_FRAME", "GameServer", "RemoteChannel", "play_remote", "read_frame", "watch_remote", "write_frame"]
+
+logger = logging.getLogger(__name__)
+
+HEADER = struct.Struct("!I")
+"""The length prefix of every frame."""
+
+MAX_FRAME = 1 << 20
+"""The default size limit of a frame's payload in bytes."""
+
+
+async def read_frame(reader: asyncio.StreamReader, *, max_frame: int = MAX_FRAME) -> bytes:
+    """Read the payload of a frame.
+
+    A frame larger than `max_frame` raises ConnectionError, as the connection cannot be trusted anymore.
+    """
+    (length,) = HEADER.unpack(await reader.readexactly(HEADER.size))
+    if length > max_frame:
+        raise ConnectionError(f"Frame of {length} bytes exceeds the limit of {max_frame} bytes.")
+
+    return await reader.readexactly(length)
+
+
+def write_frame(writer: asyncio.StreamWriter, payload: bytes) -> None:
+    """Queue a frame for writing."""
+    writer.write(HEADER.pack(len(payload)) + payload)
+
+
+def _read_hello(data: bytes) -> list[int] | dict[str, int]:
+    """Decode and check a hello, raising ValueError if it is invalid.
+
+    Deeply nested JSON raises RecursionError instead.
+    """
+    hello = json.loads(data)
+    match hello:
+        case [*ids] if all(type(id) is int for id in ids):
+            if len(set(ids)) != len(ids) or len(ids) > len(runner.DEFAULT_CHARACTER_IDS):
+                raise ValueError(f"Invalid amount of characters: {ids!r}.")
+            if not set(ids) <= {character.id for character in models.CHARACTERS}:
+                raise ValueError(f"Unknown characters: {ids!r}.")
+
+            return ids
+        case {"spectate": int(game)} if len(hello) == 1 and type(game) is int and game >= 0:
+            return {"spectate": game}
+        case _:
+            raise ValueError(f"Invalid hello: {hello!r}.")
+
+
+def _spectator_frame(event: events.BaseEvent[typing.Any]) -> bytes:
+    """Encode a whole frame of a single event for spectators."""
+    payload = wire.encode_frame([event])
+    return HEADER.pack(len(payload)) + payload
+
+
+class RemoteChannel:
+    """Sends frames of events to a client and reads its responses.
+
+    Responses are read by a single task per connection, so a request can be abandoned
+    when it times out and its late response is skipped. A malformed response is treated
+    like a timed out one and gets its entry in `comm.TIMEOUT_RESPONSES`.
+    Implements the `comm.FrameCallback` protocol.
+    """
+
+    reader: asyncio.StreamReader
+    writer: asyncio.StreamWriter
+
+    max_frame: int
+    """The size limit of a response in bytes."""
+
+    disconnected: bool
+    """Whether the client has disconnected."""
+
+    _responses: "asyncio.Queue[bytes | None]"
+    """Responses in the order they arrive, None once the client has disconnected."""
+
+    _stale: int
+    """The amount of abandoned requests whose responses are still to come."""
+
+    _reading: "asyncio.Task[None]"
+
+    def __init__(
+        self,
+        reader: asyncio.StreamReader,
+        writer: asyncio.StreamWriter,
+        *,
+        max_frame: int = MAX_FRAME,
+    ) -> None:
+        self.reader = reader
+        self.writer = writer
+        self.max_frame = max_frame
+        self.disconnected = False
+
+        self._responses = asyncio.Queue()
+        self._stale = 0
+        self._reading = asyncio.get_running_loop().create_task(self._read())
+
+    async def _read(self) -> None:
+        """Queue responses until the client disconnects."""
+        try:
+            while True:
+                self._responses.put_nowait(await read_frame(self.reader, max_frame=self.max_frame))
+        except (asyncio.IncompleteReadError, ConnectionError):
+            self.disconnected = True
+            self._responses.put_nowait(None)
+
+    async def wait_disconnected(self) -> None:
+        """Wait until the client disconnects."""
+        await asyncio.shield(self._reading)
+
+    def close(self) -> None:
+        """Stop reading responses."""
+        self._reading.cancel()
+
+    async def __call__(self, frame: comm.Frame) -> typing.Any:
+        """Send a frame, returning the response to the request at its end."""
+        write_frame(self.writer, wire.encode_frame(frame))
+        await self.writer.drain()
+
+        request = frame[-1]
+        if not isinstance(request, events.RequestEvent):
+            return None
+
+        while True:
+            try:
+                data = await self._responses.get()
+            except asyncio.CancelledError:
+                self._stale += 1
+                raise
+
+            if data is None:
+                raise ConnectionError("The client has disconnected.")
+
+            if self._stale:
+                self._stale -= 1
+                continue
+
+            try:
+                return wire.decode_response(type(request), data)
+            except (IndexError, ValueError) as e:
+                logger.warning("Malformed response to %s: %r", type(request).__name__, e)
+                return comm.TIMEOUT_RESPONSES.get(type(request))
+
+
+class _Seat(typing.NamedTuple):
+    """A connected client waiting for or playing a game."""
+
+    character_ids: list[int]
+    channel: RemoteChannel
+    done: "asyncio.Future[None]"
+
+
+class GameServer:
+    """Asyncio TCP server pairing clients into games."""
+
+    host: str
+    port: int
+    """The port to listen on, the chosen one after starting on port 0."""
+
+    rng: random.Random
+    """The generator of the seeds of every game."""
+
+    games: int
+    """The amount of finished games."""
+
+    timeout: float | None
+    """The time limit of every event in seconds."""
+
+    clock: float | None
+    """The total time of every player for their requests in seconds."""
+
+    timers: comm.Timers
+    """The deadlines of every game."""
+
+    log_directory: pathlib.Path | None
+    """The directory to record games into."""
+
+    started: int
+    """The amount of started games, which is also the number of the next game."""
+
+    spectator_limit: int
+    """The amount of events a spectator may fall behind before it skips the oldest ones."""
+
+    max_frame: int
+    """The size limit of a frame sent by a client in bytes, larger frames close the connection."""
+
+    _server: asyncio.AbstractServer | None
+    _waiting: _Seat | None
+
+    _spectators: dict[int, comm.Spectators]
+    """The spectators of every live game and of the next game if it has any."""
+
+    def __init__(
+        self,
+        host: str = "127.0.0.1",
+        port: int = 0,
+        *,
+        seed: int | None = None,
+        timeout: float | None = None,
+        clock: float | None = None,
+        log_directory: str | pathlib.Path | None = None,
+        spectator_limit: int = 1024,
+        max_frame: int = MAX_FRAME,
+    ) -> None:
+        self.host = host
+        self.port = port
+        self.rng = random.Random(seed)
+        self.games = 0
+        self.timeout = timeout
+        self.clock = clock
+        self.timers = comm.Timers()
+        self.log_directory = None if log_directory is None else pathlib.Path(log_directory)
+        self.started = 0
+        self.spectator_limit = spectator_limit
+        self.max_frame = max_frame
+
+        self._server = None
+        self._waiting = None
+        self._spectators = {}
+
+    async def start(self) -> None:
+        """Start listening for clients."""
+        self._server = await asyncio.start_server(self._connect, self.host, self.port)
+        self.port = self._server.sockets[0].getsockname()[1]
+
+    async def serve_forever(self) -> None:
+        """Serve clients until cancelled."""
+        if self._server is None:
+            await self.start()
+
+        assert self._server is not None
+        await self._server.serve_forever()
+
+    async def close(self) -> None:
+        """Stop listening for clients."""
+        if self._server is not None:
+            self._server.close()
+            await self._server.wait_closed()
+
+    async def _connect(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        """Seat a new client and play a game once it has an opponent."""
+        seat: _Seat | None = None
+        try:
+            try:
+                hello = _read_hello(await read_frame(reader, max_frame=self.max_frame))
+            except (ValueError, RecursionError) as e:
+                logger.warning("Invalid hello: %r", e)
+                return
+
+            if isinstance(hello, dict):
+                await self._spectate(hello["spectate"], reader, writer)
+                return
+
+            channel = RemoteChannel(reader, writer, max_frame=self.max_frame)
+            seat = _Seat(hello, channel, asyncio.get_running_loop().create_future())
+
+            if self._waiting is None:
+                self._waiting = seat
+                disconnected = asyncio.ensure_future(channel.wait_disconnected())
+                try:
+                    await asyncio.wait((seat.done, disconnected), return_when=asyncio.FIRST_COMPLETED)
+                finally:
+                    disconnected.cancel()
+
+                if self._waiting is seat:
+                    self._waiting = None
+                    logger.warning("Client disconnected before it got an opponent")
+                    return
+
+                await seat.done
+            else:
+                opponent, self._waiting = self._waiting, None
+                try:
+                    await self._play(opponent, seat)
+                finally:
+                    opponent.done.set_result(None)
+        except (asyncio.IncompleteReadError, ConnectionError) as e:
+            logger.warning("Client disconnected: %r", e)
+        finally:
+            if seat is not None:
+                seat.channel.close()
+            writer.close()
+
+    async def _play(self, first: _Seat, second: _Seat) -> None:
+        """Play a game between two seated clients."""
+        setup = replay.GameSetup(
+            self.rng.getrandbits(64),
+            (
+                replay.PlayerSetup.of(1, first.character_ids or runner.DEFAULT_CHARACTER_IDS),
+                replay.PlayerSetup.of(2, second.character_ids or runner.DEFAULT_CHARACTER_IDS),
+            ),
+        )
+        players, rng = setup.create()
+
+        channels = (comm.BufferedChannel(first.channel), comm.BufferedChannel(second.channel))
+        timed: gameloop.Pair[comm.Callback] = (
+            comm.TimedChannel(channels[0], self.timers, timeout=self.timeout, clock=self.clock),
+            comm.TimedChannel(channels[1], self.timers, timeout=self.timeout, clock=self.clock),
+        )
+
+        number = self.started
+        self.started += 1
+        spectators = self._spectators.setdefault(number, comm.Spectators(_spectator_frame))
+
+        with contextlib.ExitStack() as stack:
+            if self.log_directory is not None:
+                log = stack.enter_context(open(self.log_directory / f"{setup.seed:016x}.log", "wb"))
+                recorder = replay.Recorder(log, setup)
+                timed = (recorder.channel(players[0].id, timed[0]), recorder.channel(players[1].id, timed[1]))
+
+            try:
+                await gameloop.main(gameloop.State(players, timed, rng=rng, spectators=spectators))
+            except ConnectionError:
+                if not first.channel.disconnected and not second.channel.disconnected:
+                    raise
+
+                # the player who disconnected forfeits the game
+                loser = players[0] if first.channel.disconnected else players[1]
+                logger.warning("Player %d disconnected and lost game %d", loser.id, number)
+                for seat, channel in zip((first, second), channels):
+                    if not seat.channel.disconnected:
+                        await channel(events.LostEvent(side=loser.id))
+            finally:
+                del self._spectators[number]
+
+        for seat, channel in zip((first, second), channels):
+            if not seat.channel.disconnected:
+                await channel.flush()
+
+        self.games += 1
+
+    async def _spectate(self, game: int, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        """Stream the events of a game to a spectator until the game ends or the spectator leaves.
+
+        Only live games and the next game to start can be watched.
+        """
+        if game > self.started or (game < self.started and game not in self._spectators):
+            return
+
+        spectators = self._spectators.setdefault(game, comm.Spectators(_spectator_frame))
+        spectator = spectators.attach(limit=self.spectator_limit)
+
+        async def watch_reader() -> None:
+            with contextlib.suppress(ConnectionError):
+                while await reader.read(1024):
+                    pass
+
+            spectator.drop()
+
+        watching = asyncio.get_running_loop().create_task(watch_reader())
+        try:
+            while frames := await spectator.get():
+                writer.write(b"".join(frames))
+                await writer.drain()
+        finally:
+            watching.cancel()
+            spectators.detach(spectator)
+            # a game which has not started yet keeps no hub without spectators
+            if not spectators and game >= self.started and self._spectators.get(game) is spectators:
+                del self._spectators[game]
+
+
+async def play_remote(
+    callback: comm.Callback,
+    host: str = "127.0.0.1",
+    port: int = 0,
+    *,
+    character_ids: typing.Collection[int] = (),
+) -> None:
+    """Play a game on a server, delivering its events to a local callback."""
+    reader, writer = await asyncio.open_connection(host, port)
+    try:
+        write_frame(writer, json.dumps(list(character_ids)).encode())
+
+        while True:
+            try:
+                frame = wire.decode_frame(await read_frame(reader))
+            except asyncio.IncompleteReadError:
+                return
+
+            response = None
+            for event in frame:
+                response = await callback(typing.cast(events.BaseEvent[typing.Any], event))
+
+            if isinstance(frame[-1], events.RequestEvent):
+                write_frame(writer, wire.encode_response(type(frame[-1]), response))  # type: ignore
+                await writer.drain()
+    finally:
+        writer.close()
+
+
+async def watch_remote(
+    callback: comm.Callback,
+    host: str = "127.0.0.1",
+    port: int = 0,
+    *,
+    game: int = 0,
+) -> None:
+    """Spectate a game on a server, delivering its events to a local callback."""
+    reader, writer = await asyncio.open_connection(host, port)
+    try:
+        write_frame(writer, json.dumps({"spectate": game}).encode())
+
+        while True:
+            try:
+                frame = wire.decode_frame(await read_frame(reader))
+            except asyncio.IncompleteReadError:
+                return
+
+            for event in frame:
+                await callback(typing.cast(events.BaseEvent[typing.Any], event))
+    finally:
+        writer.close()
@@ -0,0 +1,139 @@
+"""Multi-process tournament runner."""
+import multiprocessing
+import os
+import time
+import typing
+
+from invokator import models
+
+from . import runner, utility
+
+__all__ = ["Tally", "play_shard", "run_tournament", "simulate"]
+
+Shard = typing.Tuple[int, int]
+"""The first seed and the amount of games of a shard."""
+
+DEFAULT_SHARD_SIZE = 200
+
+
+class Tally:
+    """Aggregated results of many games."""
+
+    games: int
+    """The amount of finished games."""
+
+    wins: dict[int, int]
+    """The amount of wins per player id."""
+
+    unfinished: int
+    """The amount of games without a loser."""
+
+    concessions: int
+    """The amount of games ended by a concession."""
+
+    rounds: int
+    """The total amount of rounds played."""
+
+    turns: int
+    """The total amount of turns played."""
+
+    elapsed: float
+    """The wall time spent on the games in seconds."""
+
+    def __init__(self) -> None:
+        self.games = 0
+        self.wins = {}
+        self.unfinished = 0
+        self.concessions = 0
+        self.rounds = 0
+        self.turns = 0
+        self.elapsed = 0.0
+
+    def add(self, result: runner.GameResult) -> None:
+        """Add the result of a single game."""
+        self.games += 1
+        self.rounds += result.rounds
+        self.turns += result.turns
+        self.concessions += result.conceded
+
+        if result.winner is None:
+            self.unfinished += 1
+        else:
+            self.wins[result.winner] = self.wins.get(result.winner, 0) + 1
+
+    @property
+    def games_per_second(self) -> float:
+        """The amount of games finished per second."""
+        return self.games / self.elapsed if self.elapsed else 0.0
+
+    def __str__(self) -> str:
+        average_rounds = self.rounds / self.games if self.games else 0.0
+        wins = ", ".join(f"{id}: {amount}" for id, amount in sorted(self.wins.items()))
+        return (
+            f"{self.games} games in {self.elapsed:.2f}s ({self.games_per_second:.1f} games/s)\n"
+            f"wins: {wins or '-'}; unfinished: {self.unfinished}; concessions: {self.concessions}\n"
+            f"average rounds: {average_rounds:.2f}; turns: {self.turns}"
+        )
+
+
+def _init_worker() -> None:
+    """Load the card data and fill the reroll odds tables once per worker process."""
+    # the card data is loaded when `models` is imported, the talent costs below are derived from it
+    characters = models.CHARACTERS
+    utility.precompute_odds({utility.talent_cost(talent) for character in characters for talent in character.talents})
+
+
+def play_shard(shard: Shard) -> list[runner.GameResult]:
+    """Play a shard of consecutively seeded games with the synchronous engine."""
+    seed, amount = shard
+    return runner.play_games(amount, seed=seed)
+
+
+def _shards(games: int, seed: int, size: int) -> typing.Iterator[Shard]:
+    """Split games into shards of at most the given size."""
+    for start in range(0, games, size):
+        yield seed + start, min(size, games - start)
+
+
+def simulate(
+    games: int,
+    *,
+    seed: int = 0,
+    workers: int | None = None,
+    shard_size: int = DEFAULT_SHARD_SIZE,
+) -> typing.Iterator[runner.GameResult]:
+    """Play games across a process pool and stream back their results.
+
+    Results are yielded in the order the shards finish.
+    """
+    workers = workers or os.cpu_count() or 1
+
+    with multiprocessing.Pool(workers, initializer=_init_worker) as pool:
+        for results in pool.imap_unordered(play_shard, _shards(games, seed, shard_size)):
+            yield from results
+
+
+def run_tournament(
+    games: int,
+    *,
+    seed: int = 0,
+    workers: int | None = None,
+    shard_size: int = DEFAULT_SHARD_SIZE,
+    progress: typing.Callable[[Tally], None] | None = None,
+) -> Tally:
+    """Play games across a process pool and aggregate their results.
+
+    The progress callback is called with the running tally after every finished shard.
+    """
+    tally = Tally()
+    start = time.perf_counter()
+
+    for index, result in enumerate(simulate(games, seed=seed, workers=workers, shard_size=shard_size), 1):
+        tally.add(result)
+
+        if progress is not None and (index % shard_size == 0 or index == games):
+            tally.elapsed = time.perf_counter() - start
+            progress(tally)
+
+    tally.elapsed = time.perf_counter() - start
+    return tally
@@ -1,2 +1,3 @@
 """TCG game utilities."""
 from .dice import *
+from .reroll import *
@@ -1,74 +1,291 @@
 """Dice game utilities."""
-from invokator import models
+import functools
+import typing
 
-__all__ = ["is_enough_dice", "recommend_dice"]
+from invokator import interface, models
 
-# TODO: Make this smarter and cleaner
+__all__ = [
+    "Affordable",
+    "DiceCounts",
+    "NormalizedCost",
+    "affordable",
+    "can_pay",
+    "card_cost",
+    "count_dice",
+    "is_enough_dice",
+    "normalize_cost",
+    "optimal_payment",
+    "payments",
+    "recommend_dice",
+    "talent_cost",
+    "to_elements",
+]
 
+DiceCounts = typing.Tuple[int, ...]
+"""The amount of dice of every element in the order of `interface.dice.ELEMENTS`."""
 
-def is_enough_dice(dice: list[models.Element], cost: list[models.DiceCost]) -> bool:
-    """Check if there are enough dice for a cost."""
-    return recommend_dice(dice, cost) is not None
+SLOTS = len(interface.dice.ELEMENTS)
+OMNI_SLOT = interface.dice.DICE_SLOTS[models.Element.OMNI]
+NO_DICE: DiceCounts = (0,) * SLOTS
 
+CACHE_SIZE = 1 << 16
+"""The amount of dice and cost pairs whose payments are cached, enough for every hand of 8 dice and a few costs."""
 
-def recommend_dice(
-    dice: list[models.Element],
-    cost: list[models.DiceCost],
-) -> list[models.Element] | None:
-    """Recommend dice to use for a cost.
+_TALENT_COSTS: dict[int, "NormalizedCost"] = {}
+_CARD_COSTS: dict[int, "NormalizedCost"] = {}
 
-    Dice should already be sorted.
-    """
-    element: models.Element | None = None  # null = same, omni = any
-    element_amount: int = 0
-    omni_amount: int = 0
+
+class NormalizedCost(typing.NamedTuple):
+    """A dice cost split by the kind of dice it requires."""
+
+    aligned: tuple[tuple[int, int], ...]
+    """Amounts of dice of a specific element, by dice slot."""
+
+    same: int
+    """Amount of dice which must all be of the same element."""
+
+    unaligned: int
+    """Amount of dice of any element."""
+
+
+def count_dice(dice: typing.Iterable[models.Element]) -> DiceCounts:
+    """Count dice by element, raising ValueError for elements which are not dice."""
+    counts = [0] * SLOTS
+    for die in dice:
+        slot = interface.dice.DICE_SLOTS.get(die)
+        if slot is None:
+            raise ValueError(f"{die.value} is not a dice element.")
+
+        counts[slot] += 1
+
+    return tuple(counts)
+
+
+def to_elements(counts: DiceCounts) -> list[models.Element]:
+    """Expand dice counts into a list of dice."""
+    return [element for element, amount in zip(interface.dice.ELEMENTS, counts) for _ in range(amount)]
+
+
+def normalize_cost(cost: typing.Iterable[models.DiceCost]) -> NormalizedCost:
+    """Split a dice cost by the kind of dice it requires."""
+    aligned: dict[int, int] = {}
+    same = unaligned = 0
 
     for dice_cost in cost:
         if dice_cost.element == models.Element.OMNI:
-            omni_amount = dice_cost.amount
+            unaligned += dice_cost.amount
+        elif dice_cost.element is None:
+            same += dice_cost.amount
         else:
-            element = dice_cost.element
-            element_amount = dice_cost.amount
+            slot = interface.dice.DICE_SLOTS[dice_cost.element]
+            aligned[slot] = aligned.get(slot, 0) + dice_cost.amount
+
+    return NormalizedCost(tuple(sorted(aligned.items())), same, unaligned)
+
+
+def _with(counts: DiceCounts, slot: int, amount: int) -> DiceCounts:
+    """Return counts with a single slot changed."""
+    changed = list(counts)
+    changed[slot] += amount
+    return tuple(changed)
+
+
+def _aligned_options(remaining: DiceCounts, slot: int, amount: int) -> typing.Iterator[DiceCounts]:
+    """Yield the ways to pay for dice of a specific element, topped up with omni dice."""
+    omni = remaining[OMNI_SLOT]
+    for colored in range(max(0, amount - omni), min(amount, remaining[slot]) + 1):
+        yield _with(_with(NO_DICE, slot, colored), OMNI_SLOT, amount - colored)
+
+
+def _same_options(remaining: DiceCounts, amount: int) -> typing.Iterator[DiceCounts]:
+    """Yield the ways to pay for dice of the same element."""
+    if remaining[OMNI_SLOT] >= amount:
+        yield _with(NO_DICE, OMNI_SLOT, amount)
+
+    if amount == 0:
+        return
+
+    for slot in range(SLOTS):
+        if slot != OMNI_SLOT and remaining[slot]:
+            for option in _aligned_options(remaining, slot, amount):
+                if option[slot]:
+                    yield option
+
+
+def _unaligned_options(remaining: DiceCounts, amount: int, slot: int = 0) -> typing.Iterator[DiceCounts]:
+    """Yield the ways to pay for dice of any element."""
+    if amount == 0:
+        yield NO_DICE
+        return
+
+    if slot == SLOTS:
+        return
+
+    for used in range(min(amount, remaining[slot]), -1, -1):
+        for rest in _unaligned_options(remaining, amount - used, slot + 1):
+            yield _with(rest, slot, used)
+
+
+@functools.lru_cache(maxsize=CACHE_SIZE)
+def payments(counts: DiceCounts, cost: NormalizedCost) -> tuple[DiceCounts, ...]:
+    """Return every distinct way to pay for a cost with the given dice."""
+    stages: list[typing.Callable[[DiceCounts], typing.Iterator[DiceCounts]]] = [
+        functools.partial(_aligned_options, slot=slot, amount=amount) for slot, amount in cost.aligned
+    ]
+    stages.append(functools.partial(_same_options, amount=cost.same))
+    stages.append(functools.partial(_unaligned_options, amount=cost.unaligned))
+
+    results: dict[DiceCounts, None] = {}
+
+    def pay(remaining: DiceCounts, paid: DiceCounts, stage: int) -> None:
+        if stage == len(stages):
+            results[paid] = None
+            return
+
+        for option in stages[stage](remaining):
+            pay(
+                tuple(left - used for left, used in zip(remaining, option)),
+                tuple(total + used for total, used in zip(paid, option)),
+                stage + 1,
+            )
+
+    pay(counts, NO_DICE, 0)
+    return tuple(results)
 
-    if element_amount + omni_amount > len(dice):
+
+@functools.lru_cache(maxsize=CACHE_SIZE)
+def can_pay(counts: DiceCounts, cost: NormalizedCost) -> bool:
+    """Check if a cost can be paid with the given dice without enumerating payments.
+
+    Paying aligned dice with their own element before omni dice is never worse,
+    so only the element of the same-element dice has to be chosen.
+    """
+    remaining = list(counts)
+    for slot, amount in cost.aligned:
+        colored = min(amount, remaining[slot])
+        remaining[slot] -= colored
+        remaining[OMNI_SLOT] -= amount - colored
+        if remaining[OMNI_SLOT] < 0:
+            return False
+
+    if cost.same:
+        best = max(amount for slot, amount in enumerate(remaining) if slot != OMNI_SLOT)
+        used = min(best, cost.same)
+        if used + remaining[OMNI_SLOT] < cost.same:
+            return False
+
+    return sum(remaining) >= cost.same + cost.unaligned
+
+
+def talent_cost(talent: models.Talent) -> NormalizedCost:
+    """Return the normalized cost of a talent, normalized only once per talent id."""
+    cost = _TALENT_COSTS.get(talent.id)
+    if cost is None:
+        cost = _TALENT_COSTS[talent.id] = normalize_cost(talent.cost)
+
+    return cost
+
+
+def card_cost(card: models.Card) -> NormalizedCost:
+    """Return the normalized cost of a card, normalized only once per card id."""
+    cost = _CARD_COSTS.get(card.id)
+    if cost is None:
+        cost = _CARD_COSTS[card.id] = normalize_cost([card.cost])
+
+    return cost
+
+
+def _payment_key(counts: DiceCounts, payment: DiceCounts, preferred: tuple[int, ...]) -> tuple[typing.Any, ...]:
+    """Rank a payment, lower keeps more useful dice.
+
+    Omni dice are the most useful, then dice of the preferred elements in order,
+    then large groups of the same element.
+    """
+    groups = sorted(
+        (left - used for slot, (left, used) in enumerate(zip(counts, payment)) if slot != OMNI_SLOT),
+        reverse=True,
+    )
+    return (
+        payment[OMNI_SLOT],
+        tuple(payment[slot] for slot in preferred),
+        tuple(-amount for amount in groups),
+        payment,
+    )
+
+
+@functools.lru_cache(maxsize=CACHE_SIZE)
+def optimal_payment(counts: DiceCounts, cost: NormalizedCost, preferred: tuple[int, ...] = ()) -> DiceCounts | None:
+    """Return the payment for a cost which keeps the most useful dice, None if the cost cannot be paid.
+
+    Preferred elements are given as dice slots, most preferred first.
+    """
+    options = payments(counts, cost)
+    if not options:
         return None
 
-    recommended: list[models.Element] = []
+    return min(options, key=lambda payment: _payment_key(counts, payment, preferred))
 
-    present_omnis = dice.count(models.Element.OMNI)
-    omnilessdice = [die for die in dice if die != models.Element.OMNI]
 
-    if element is None:
-        # depends on dict ordering
-        priority: dict[models.Element, int] = {}
-        for die_element in omnilessdice:
-            priority[die_element] = priority.get(die_element, 0) + 1
+def is_enough_dice(dice: typing.Iterable[models.Element], cost: NormalizedCost) -> bool:
+    """Check if dice are an exact payment for a cost, as listed by `payments`.
 
-        for die_element, die_amount in reversed(priority.items()):
-            if die_amount + present_omnis >= element_amount:
-                used_colored = min(die_amount, element_amount)
-                recommended.extend([die_element] * used_colored)
-                recommended.extend([models.Element.OMNI] * (element_amount - used_colored))
-                break
-        else:
-            return None
+    Extra dice and elements which are not dice are never a payment.
+    """
+    try:
+        counts = count_dice(dice)
+    except ValueError:
+        return False
+
+    return counts in payments(counts, cost)
+
+
+def recommend_dice(dice: interface.Dice, cost: NormalizedCost) -> list[models.Element] | None:
+    """Recommend dice to use for a cost, None if there are not enough dice."""
+    preferred = tuple(interface.dice.DICE_SLOTS[element] for element in dice.preferred_elements)
+    payment = optimal_payment(tuple(dice.counts), cost, preferred)
+    return None if payment is None else to_elements(payment)
+
+
+class Affordable(typing.NamedTuple):
+    """Everything a player can pay for with their current dice."""
+
+    talents: dict[int, list[models.Element]]
+    """Recommended payment of every affordable talent by talent id."""
+
+    cards: dict[int, list[models.Element]]
+    """Recommended payment of every affordable card in the hand by card id."""
+
+
+def affordable(player: interface.Player) -> Affordable:
+    """Return what a player can pay for, with the recommended payment of each.
+
+    Covers the active talents of all characters and every card in the hand.
+    The result is cached on the dice until they change, so it must not be mutated.
+    """
+    key = ("affordable", tuple(character.id for character in player.characters), tuple(player.hand.card_ids))
+    cached: Affordable | None = player.dice.cache.get(key)
+    if cached is not None:
+        return cached
 
-    elif element is not None:
-        die_element = element
-        die_amount = sum(1 for die in omnilessdice if die == element)
-        if die_amount + present_omnis < element_amount:
-            return None
+    counts = tuple(player.dice.counts)
+    preferred = tuple(interface.dice.DICE_SLOTS[element] for element in player.dice.preferred_elements)
 
-        used_colored = min(die_amount, element_amount)
-        recommended.extend([die_element] * used_colored)
-        recommended.extend([models.Element.OMNI] * (element_amount - used_colored))
+    talents: dict[int, list[models.Element]] = {}
+    for character in player.characters:
+        for talent in character.talents:
+            if talent.type == models.TalentType.PASSIVE:
+                continue
 
-    # use the unrecommended dice
-    if omni_amount:
-        unrecommended_dice = dice.copy()
-        for die in recommended:
-            unrecommended_dice.remove(die)
+            payment = optimal_payment(counts, talent_cost(talent), preferred)
+            if payment is not None:
+                talents[talent.id] = to_elements(payment)
 
-        recommended.extend(unrecommended_dice[-omni_amount:])
+    cards: dict[int, list[models.Element]] = {}
+    for card in player.hand.cards:
+        if card.id not in cards:
+            payment = optimal_payment(counts, card_cost(card), preferred)
+            if payment is not None:
+                cards[card.id] = to_elements(payment)
 
-    return recommended
+    result = player.dice.cache[key] = Affordable(talents, cards)
+    return result
@@ -0,0 +1,96 @@
+"""Exact dice reroll odds."""
+import functools
+import itertools
+import typing
+
+from invokator import interface, models
+
+from .dice import (
+    NO_DICE,
+    SLOTS,
+    DiceCounts,
+    NormalizedCost,
+    can_pay,
+    talent_cost,
+    to_elements,
+)
+
+__all__ = [
+    "RerollAdvice",
+    "advise_reroll",
+    "afford_probability",
+    "precompute_odds",
+    "recommend_reroll",
+    "reroll_options",
+]
+
+
+class RerollAdvice(typing.NamedTuple):
+    """The best dice to reroll for a set of costs."""
+
+    reroll: DiceCounts
+    """The dice to reroll."""
+
+    odds: tuple[float, ...]
+    """The probability of affording every cost after the reroll."""
+
+
+@functools.lru_cache(maxsize=None)
+def afford_probability(kept: DiceCounts, rerolled: int, cost: NormalizedCost) -> float:
+    """Return the exact probability of affording a cost after rolling more dice.
+
+    Every die lands on each of the dice elements with the same probability.
+    The table for a cost covers every dice multiset once filled, which is a few thousand states for 8 dice.
+    """
+    if rerolled == 0:
+        return 1.0 if can_pay(kept, cost) else 0.0
+
+    total = 0.0
+    for slot in range(SLOTS):
+        rolled = list(kept)
+        rolled[slot] += 1
+        total += afford_probability(tuple(rolled), rerolled - 1, cost)
+
+    return total / SLOTS
+
+
+def precompute_odds(costs: typing.Iterable[NormalizedCost], amount: int = 8) -> None:
+    """Fill the probability tables of costs for every multiset of the given amount of dice."""
+    for cost in costs:
+        afford_probability(NO_DICE, amount, cost)
+
+
+def reroll_options(counts: DiceCounts) -> typing.Iterator[DiceCounts]:
+    """Yield every distinct multiset of dice to reroll, fewest dice first."""
+    options = itertools.product(*(range(amount + 1) for amount in counts))
+    yield from sorted(options, key=sum)
+
+
+@functools.lru_cache(maxsize=4096)
+def advise_reroll(counts: DiceCounts, costs: tuple[NormalizedCost, ...]) -> RerollAdvice:
+    """Return the reroll which maximizes the expected amount of affordable costs.
+
+    Of equally good rerolls the one with the fewest dice is chosen.
+    """
+    best: RerollAdvice | None = None
+    best_score = -1.0
+
+    for reroll in reroll_options(counts):
+        kept = tuple(amount - used for amount, used in zip(counts, reroll))
+        odds = tuple(afford_probability(kept, sum(reroll), cost) for cost in costs)
+        if sum(odds) > best_score + 1e-12:
+            best, best_score = RerollAdvice(reroll, odds), sum(odds)
+
+    assert best is not None
+    return best
+
+
+def recommend_reroll(player: interface.Player) -> list[models.Element]:
+    """Recommend dice to reroll for the talents of the active character."""
+    if player.active_character is None:
+        return []
+
+    costs = tuple(
+        talent_cost(talent) for talent in player.active_character.talents if talent.type != models.TalentType.PASSIVE
+    )
+    return to_elements(advise_reroll(tuple(player.dice.counts), costs).reroll)
@@ -1,5 +1,7 @@
 """Interface module for Invokator."""
+from . import zobrist  # type: ignore # noqa
 from .character import *
+from .compact import *
 from .deck import *
 from .dice import *
 from .hand import *
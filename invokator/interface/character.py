@@ -5,6 +5,11 @@ import pydantic
 
 from invokator import models
 
+from . import zobrist
+
+if typing.TYPE_CHECKING:
+    from .player import Player
+
 __all__ = ["Character"]
 
 NO_DEFAULT: typing.Any = pydantic.Field(default_factory=lambda: pydantic.fields.Undefined)
@@ -33,14 +38,58 @@ class Character(models.Character):
     equipped_weapon: models.WeaponCard | None = None
     equipped_artifact: models.ArtifactCard | None = None
 
+    _player: "Player | None" = pydantic.PrivateAttr(None)
+    """The player whose alive characters are updated on death."""
+    _slot: int = pydantic.PrivateAttr(0)
+    """The index of the character in the player's characters."""
+
     def __init__(self, **kwargs: typing.Any) -> None:
         super().__init__(**kwargs)
 
         self.current_health = self.health
 
+    def clone(self) -> "Character":
+        """Return a copy sharing the immutable card data.
+
+        Skips the validation and field iteration of `copy()`, which dominate in tree search.
+        """
+        character = Character.__new__(Character)
+        values = self.__dict__.copy()
+        values["status"] = [status.copy() for status in self.status]
+        if self.afflicted_elements is not None:
+            values["afflicted_elements"] = self.afflicted_elements.copy()
+
+        object.__setattr__(character, "__dict__", values)
+        object.__setattr__(character, "__fields_set__", self.__fields_set__)
+        object.__setattr__(character, "_talent_index", self._talent_index)
+        object.__setattr__(character, "_player", None)
+        object.__setattr__(character, "_slot", self._slot)
+        return character
+
     def change_health(self, amount: int) -> None:
         """Change health."""
-        self.current_health = min(self.health, max(0, self.current_health + amount))
+        before = self.current_health
+        self.current_health = min(self.health, max(0, before + amount))
+        if self._player is None or self.current_health == before:
+            return
+
+        self._player.toggle_zobrist(
+            zobrist.key("health", self.id, before) ^ zobrist.key("health", self.id, self.current_health)
+        )
+        if (before > 0) != (self.current_health > 0):
+            self._player.set_alive(self._slot, before == 0)
+
+    @property
+    def zobrist(self) -> int:
+        """Hash of the character's mutable state."""
+        value = zobrist.key("health", self.id, self.current_health)
+        value ^= zobrist.key("energy", self.id, self.current_energy)
+        for element in self.afflicted_elements or ():
+            value ^= zobrist.key("element", self.id, element.value)
+        for status in self.status:
+            value ^= zobrist.key("status", self.id, status.id, status.duration)
+
+        return value
 
     @property
     def dead(self) -> bool:
@@ -0,0 +1,183 @@
+"""Compact array-backed player state."""
+import array
+import json
+import random
+import typing
+
+from invokator import models
+
+from .character import Character
+from .player import Player
+
+__all__ = ["CompactPlayer"]
+
+ELEMENT_FLAGS: dict[models.Element, int] = {element: 1 << index for index, element in enumerate(models.Element)}
+"""Bit flags of every element."""
+
+CARD_INDEX: dict[int, int] = {card.id: index for index, card in enumerate(models.CARDS)}
+"""Index of every card id in `models.CARDS`."""
+
+CHARACTER_MODELS: dict[int, models.Character] = {character.id: character for character in models.CHARACTERS}
+"""Character data by id."""
+
+
+def _to_flags(elements: typing.Iterable[models.Element] | None) -> int:
+    """Pack elements into bit flags."""
+    flags = 0
+    for element in elements or ():
+        flags |= ELEMENT_FLAGS[element]
+
+    return flags
+
+
+def _from_flags(flags: int) -> list[models.Element]:
+    """Unpack bit flags into elements."""
+    return [element for element, flag in ELEMENT_FLAGS.items() if flags & flag]
+
+
+class CompactPlayer:
+    """Struct-of-arrays snapshot of a player.
+
+    Characters are stored in the order of `Player.characters`,
+    cards as indices into `models.CARDS` and dice as counts like `Dice.counts`.
+    """
+
+    __slots__ = (
+        "id",
+        "character_ids",
+        "health",
+        "energy",
+        "elements",
+        "active",
+        "dice",
+        "hand",
+        "deck",
+        "declared_end",
+    )
+
+    id: int
+    """The id of the player."""
+
+    character_ids: tuple[int, ...]
+    """The ids of the player's characters."""
+
+    health: "array.array[int]"
+    """The current health of every character."""
+
+    energy: "array.array[int]"
+    """The current energy of every character."""
+
+    elements: "array.array[int]"
+    """The afflicted element flags of every character."""
+
+    active: int
+    """The index of the active character, -1 if there is none."""
+
+    dice: "array.array[int]"
+    """The amount of dice of every element."""
+
+    hand: "array.array[int]"
+    """The cards in the hand."""
+
+    deck: "array.array[int]"
+    """The cards left in the deck."""
+
+    declared_end: bool
+    """Whether the player has declared the end of their round."""
+
+    @classmethod
+    def from_player(cls, player: Player) -> "CompactPlayer":
+        """Take a snapshot of a player."""
+        self = cls.__new__(cls)
+        self.id = player.id
+        self.character_ids = tuple(character.id for character in player.characters)
+        self.health = array.array("h", [character.current_health for character in player.characters])
+        self.energy = array.array("h", [character.current_energy for character in player.characters])
+        self.elements = array.array("H", [_to_flags(character.afflicted_elements) for character in player.characters])
+        self.active = -1 if player.active_character is None else player.characters.index(player.active_character)
+
+        self.dice = array.array("B", player.dice.counts)
+
+        self.hand = array.array("H", [CARD_INDEX[card.id] for card in player.hand.cards])
+        self.deck = array.array("H", [CARD_INDEX[card.id] for card in player.deck.cards])
+        self.declared_end = player.declared_end
+        return self
+
+    def copy(self) -> "CompactPlayer":
+        """Return an independent copy of this snapshot."""
+        other = CompactPlayer.__new__(CompactPlayer)
+        other.id = self.id
+        other.character_ids = self.character_ids
+        other.health = self.health[:]
+        other.energy = self.energy[:]
+        other.elements = self.elements[:]
+        other.active = self.active
+        other.dice = self.dice[:]
+        other.hand = self.hand[:]
+        other.deck = self.deck[:]
+        other.declared_end = self.declared_end
+        return other
+
+    def to_bytes(self) -> bytes:
+        """Encode the snapshot into compact UTF-8 JSON."""
+        values = [
+            self.id,
+            self.character_ids,
+            self.health.tolist(),
+            self.energy.tolist(),
+            self.elements.tolist(),
+            self.active,
+            self.dice.tolist(),
+            self.hand.tolist(),
+            self.deck.tolist(),
+            self.declared_end,
+        ]
+        return json.dumps(values, separators=(",", ":")).encode()
+
+    @classmethod
+    def from_bytes(cls, data: bytes) -> "CompactPlayer":
+        """Decode a snapshot from compact UTF-8 JSON."""
+        id, character_ids, health, energy, elements, active, dice, hand, deck, declared_end = json.loads(data)
+
+        self = cls.__new__(cls)
+        self.id = id
+        self.character_ids = tuple(character_ids)
+        self.health = array.array("h", health)
+        self.energy = array.array("h", energy)
+        self.elements = array.array("H", elements)
+        self.active = active
+        self.dice = array.array("B", dice)
+        self.hand = array.array("H", hand)
+        self.deck = array.array("H", deck)
+        self.declared_end = declared_end
+        return self
+
+    def apply(self, player: Player) -> None:
+        """Restore a player with the same characters to this snapshot."""
+        if tuple(character.id for character in player.characters) != self.character_ids:
+            raise ValueError("The player's characters do not match the snapshot.")
+
+        for index, character in enumerate(player.characters):
+            character.current_health = self.health[index]
+            character.current_energy = self.energy[index]
+            character.afflicted_elements = _from_flags(self.elements[index])
+
+        player.reset_alive()
+
+        if self.active < 0:
+            player.active_character = None
+        else:
+            player.switch_character(self.character_ids[self.active])
+
+        player.dice.replace_counts(list(self.dice))
+        player.hand.replace([models.CARDS[index] for index in self.hand])
+        player.deck.replace([models.CARDS[index] for index in self.deck])
+        player.declared_end = self.declared_end
+        player.rehash()
+
+    def to_player(self, *, rng: random.Random | None = None) -> Player:
+        """Create a new player from this snapshot."""
+        characters = [Character.parse_obj(CHARACTER_MODELS[id]) for id in self.character_ids]
+        player = Player(self.id, characters, [], rng=rng)
+        self.apply(player)
+        return player
@@ -1,38 +1,106 @@
 """Deck interface."""
+import math
 import random
 
 from invokator import models
 
+from . import zobrist
+
 __all__ = ["Deck"]
 
 
 class Deck:
-    """TCG deck interface."""
+    """TCG deck interface.
+
+    The deck is shuffled lazily, every draw picks a random remaining card like a step of Fisher-Yates.
+    The order of `cards` is therefore meaningless and only the remaining cards are part of the state.
+    """
 
     cards: list[models.Card]
+    rng: random.Random
+
+    zobrist: int
+    """Incrementally maintained hash of the remaining cards."""
+
+    _amounts: dict[int, int]
+    """The amount of remaining copies of every card id."""
 
-    def __init__(self, cards: list[models.Card]) -> None:
+    def __init__(self, cards: list[models.Card], *, rng: random.Random | None = None) -> None:
+        self.rng = rng or random.Random()
+        self.replace(cards)
+
+    def clone(self, *, rng: random.Random | None = None) -> "Deck":
+        """Return a copy with the same cards."""
+        deck = Deck.__new__(Deck)
+        deck.cards = self.cards.copy()
+        deck.rng = rng or self.rng
+        deck.zobrist = self.zobrist
+        deck._amounts = self._amounts.copy()
+        return deck
+
+    def replace(self, cards: list[models.Card]) -> None:
+        """Replace all cards."""
         self.cards = cards
-        self.shuffle()
+        self._amounts = {}
+        self.zobrist = 0
+        for card in cards:
+            self._amounts[card.id] = self._amounts.get(card.id, 0) + 1
+            self.zobrist += zobrist.key("deck", card.id)
+
+        self.zobrist &= zobrist.MASK
 
     def shuffle(self) -> None:
-        """Shuffle the deck."""
-        random.shuffle(self.cards)
+        """Shuffle the deck.
+
+        Draws are already random, so there is nothing to do until a card is drawn.
+        """
 
     def draw(self) -> models.Card:
-        """Draw a card from the deck."""
-        return self.cards.pop()
+        """Draw a random card from the deck."""
+        index = self.rng.randrange(len(self.cards))
+        self.cards[index], self.cards[-1] = self.cards[-1], self.cards[index]
+        card = self.cards.pop()
+
+        if self._amounts[card.id] == 1:
+            del self._amounts[card.id]
+        else:
+            self._amounts[card.id] -= 1
+
+        self.zobrist = (self.zobrist - zobrist.key("deck", card.id)) & zobrist.MASK
+        return card
 
     def draw_multiple(self, amount: int = 5) -> list[models.Card]:
-        """Preview the top card of the deck."""
-        return [self.cards.pop() for _ in range(min(amount, self.amount))]
+        """Draw multiple random cards from the deck."""
+        return [self.draw() for _ in range(min(amount, self.amount))]
 
     def reshuffle(self, cards: list[models.Card]) -> list[models.Card]:
         """Return cards back to deck and draw a new hand."""
         self.cards.extend(cards)
-        self.shuffle()
+        for card in cards:
+            self._amounts[card.id] = self._amounts.get(card.id, 0) + 1
+            self.zobrist += zobrist.key("deck", card.id)
+
+        self.zobrist &= zobrist.MASK
         return self.draw_multiple(len(cards))
 
+    def count(self, id: int) -> int:
+        """Return the amount of remaining copies of a card."""
+        return self._amounts.get(id, 0)
+
+    def draw_probability(self, id: int, draws: int = 1) -> float:
+        """Return the probability of drawing at least one copy of a card in the next draws."""
+        remaining = self.amount
+        draws = min(draws, remaining)
+        if not draws:
+            return 0.0
+
+        return 1 - math.comb(remaining - self.count(id), draws) / math.comb(remaining, draws)
+
+    @property
+    def composition(self) -> dict[int, int]:
+        """Return the amount of remaining copies of every card id."""
+        return self._amounts.copy()
+
     @property
     def amount(self) -> int:
         """Return the amount of cards in the deck."""
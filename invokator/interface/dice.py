@@ -1,8 +1,11 @@
 """Dice interface."""
 import random
+import typing
 
 from invokator import models
 
+from . import zobrist
+
 __all__ = ["Dice"]
 
 ELEMENTS = [
@@ -16,54 +19,169 @@ ELEMENTS = [
     models.Element.OMNI,
 ]
 
+DICE_SLOTS: dict[models.Element, int] = {element: index for index, element in enumerate(ELEMENTS)}
+"""Index of every dice element in a dice count vector."""
+
+DIE_KEYS = [zobrist.key("die", element.value) for element in ELEMENTS]
+"""Zobrist key of a die of every element."""
+
 
 class Dice:
-    """Dice interface."""
+    """Dice interface.
+
+    Dice are stored as a count vector in the order of `ELEMENTS`, lists are only built when requested.
+    """
+
+    counts: list[int]
+    """The amount of dice of every element."""
+
+    rng: random.Random
+
+    zobrist: int
+    """Incrementally maintained hash of the dice."""
 
-    dice: list[models.Element]
-    preferred_elements: list[models.Element]
+    cache: dict[typing.Hashable, typing.Any]
+    """Values derived from the dice, cleared whenever the dice change."""
 
-    def __init__(self, *, preferred_elements: list[models.Element]) -> None:
-        self.dice = []
+    _preferred_elements: list[models.Element]
+    _view: list[models.Element] | None
+
+    def __init__(self, *, preferred_elements: list[models.Element], rng: random.Random | None = None) -> None:
+        self.counts = [0] * len(ELEMENTS)
         self.preferred_elements = [models.Element.OMNI] + preferred_elements
+        self.rng = rng or random.Random()
+        self.zobrist = 0
+
+    def clone(self, *, rng: random.Random | None = None) -> "Dice":
+        """Return a copy with the same dice."""
+        dice = Dice.__new__(Dice)
+        dice.counts = self.counts.copy()
+        dice._preferred_elements = self._preferred_elements.copy()
+        dice._view = None
+        dice.cache = {}
+        dice.rng = rng or self.rng
+        dice.zobrist = self.zobrist
+        return dice
+
+    @property
+    def preferred_elements(self) -> list[models.Element]:
+        """The elements to sort first."""
+        return self._preferred_elements
+
+    @preferred_elements.setter
+    def preferred_elements(self, elements: list[models.Element]) -> None:
+        self._preferred_elements = elements
+        self._changed()
+
+    @property
+    def dice(self) -> list[models.Element]:
+        """The sorted dice."""
+        if self._view is None:
+            self._view = self._sorted(self.counts)
+
+        return self._view
+
+    @dice.setter
+    def dice(self, dice: list[models.Element]) -> None:
+        self.replace(dice)
 
-    def _sort_dice(self, dice: list[models.Element] | None = None) -> None:
-        """Sort dice."""
-        dice = dice or self.dice
+    @property
+    def amount(self) -> int:
+        """The amount of dice."""
+        return sum(self.counts)
+
+    def _sorted(self, counts: list[int]) -> list[models.Element]:
+        """Expand dice counts into a sorted list."""
+        preferred = self._preferred_elements
         # omni: (0, 0, -1, 0)
         # preferred: (1, -1, -3, 3)
         # random: (1, 0, -2, 5)
         # single: (1, 0, -1, 7)
-        dice.sort(
-            key=lambda x: (
-                x.value != models.Element.OMNI,
-                -(x.value in self.preferred_elements and self.preferred_elements.index(x.value)),
-                -dice.count(x),
-                x.value,
-            )
+        slots = sorted(
+            (slot for slot, amount in enumerate(counts) if amount),
+            key=lambda slot: (
+                ELEMENTS[slot] != models.Element.OMNI,
+                -(ELEMENTS[slot] in preferred and preferred.index(ELEMENTS[slot])),
+                -counts[slot],
+                ELEMENTS[slot].value,
+            ),
         )
+        return [ELEMENTS[slot] for slot in slots for _ in range(counts[slot])]
+
+    def _changed(self) -> None:
+        """Drop everything derived from the previous dice."""
+        self._view = None
+        self.cache = {}
+
+    def _add(self, slot: int) -> None:
+        """Add a die."""
+        self.counts[slot] += 1
+        self.zobrist = (self.zobrist + DIE_KEYS[slot]) & zobrist.MASK
+
+    def _remove(self, element: models.Element) -> None:
+        """Remove a die, its availability must have been checked."""
+        slot = DICE_SLOTS[element]
+        self.counts[slot] -= 1
+        self.zobrist = (self.zobrist - DIE_KEYS[slot]) & zobrist.MASK
+
+    def has(self, elements: list[models.Element]) -> bool:
+        """Whether all the given dice are available, elements which are not dice never are."""
+        counts = self.counts.copy()
+        for element in elements:
+            slot = DICE_SLOTS.get(element)
+            if slot is None or not counts[slot]:
+                return False
+
+            counts[slot] -= 1
+
+        return True
+
+    def _check(self, elements: list[models.Element]) -> None:
+        """Raise before any die is touched unless all the given dice are available."""
+        if not self.has(elements):
+            raise ValueError(f"Not all of the dice {[element.value for element in elements]} are available.")
+
+    def replace_counts(self, counts: list[int]) -> None:
+        """Replace all dice with the given counts."""
+        self.counts = list(counts)
+        self.zobrist = sum(amount * key for amount, key in zip(self.counts, DIE_KEYS)) & zobrist.MASK
+        self._changed()
+
+    def replace(self, dice: list[models.Element]) -> None:
+        """Replace all dice."""
+        counts = [0] * len(ELEMENTS)
+        for die in dice:
+            counts[DICE_SLOTS[die]] += 1
+
+        self.replace_counts(counts)
 
     def roll(self, amount: int = 8) -> list[models.Element]:
         """Roll dice."""
-        self.dice = [random.choice(ELEMENTS) for _ in range(amount)]
-        self._sort_dice()
+        counts = [0] * len(ELEMENTS)
+        for _ in range(amount):
+            counts[DICE_SLOTS[self.rng.choice(ELEMENTS)]] += 1
+
+        self.replace_counts(counts)
         return self.dice
 
     def reroll(self, elements: list[models.Element]) -> list[models.Element]:
         """Reroll dice and return new."""
-        new: list[models.Element] = []
+        self._check(elements)
+        new = [0] * len(ELEMENTS)
 
         for element in elements:
-            self.dice.remove(element)
-            element = random.choice(ELEMENTS)
-            new.append(element)
-            self.dice.append(element)
+            self._remove(element)
+            slot = DICE_SLOTS[self.rng.choice(ELEMENTS)]
+            new[slot] += 1
+            self._add(slot)
 
-        self._sort_dice()
-        self._sort_dice(new)
-        return new
+        self._changed()
+        return self._sorted(new)
 
     def remove(self, elements: list[models.Element]) -> None:
         """Remove dice."""
+        self._check(elements)
         for element in elements:
-            self.dice.remove(element)
+            self._remove(element)
+
+        self._changed()
@@ -1,6 +1,11 @@
 """Hand interface."""
+import bisect
+import typing
+
 from invokator import models
 
+from . import zobrist
+
 __all__ = ["Hand"]
 
 CARD_TYPE_ORDER = (
@@ -11,32 +16,105 @@ CARD_TYPE_ORDER = (
     models.CardType.ARTIFACT,
 )
 
+SortKey = typing.Tuple[int, str, int]
+
+_SORT_KEYS: dict[int, SortKey] = {}
+"""Sort key of every card id seen so far."""
+
+
+def _sort_key(card: models.Card) -> SortKey:
+    """Return the position of a card in a hand, computed once per card id."""
+    key = _SORT_KEYS.get(card.id)
+    if key is None:
+        key = _SORT_KEYS[card.id] = (CARD_TYPE_ORDER.index(card.type), card.name, card.id)
+
+    return key
+
 
 class Hand:
-    """TCG hand interface."""
+    """TCG hand interface.
+
+    Cards are kept sorted by type and name, copies of a card are next to each other.
+    """
 
     cards: list[models.Card]
 
+    zobrist: int
+    """Incrementally maintained hash of the cards."""
+
+    _keys: list[SortKey]
+    """The sort key of every card, in the same order."""
+
+    _amounts: dict[int, int]
+    """The amount of copies of every card id."""
+
+    _card_ids: list[int] | None
+
     def __init__(self, cards: list[models.Card] | None = None) -> None:
-        self.cards = cards or []
-        self._sort_cards()
+        self.replace(cards or [])
+
+    def clone(self) -> "Hand":
+        """Return a copy with the same cards."""
+        hand = Hand.__new__(Hand)
+        hand.cards = self.cards.copy()
+        hand.zobrist = self.zobrist
+        hand._keys = self._keys.copy()
+        hand._amounts = self._amounts.copy()
+        hand._card_ids = self._card_ids
+        return hand
+
+    def replace(self, cards: list[models.Card]) -> None:
+        """Replace all cards."""
+        self.cards = sorted(cards, key=_sort_key)
+        self._keys = [_sort_key(card) for card in self.cards]
+        self._amounts = {}
+        for card in self.cards:
+            self._amounts[card.id] = self._amounts.get(card.id, 0) + 1
 
-    def _sort_cards(self) -> None:
-        """Sort the cards by type."""
-        self.cards.sort(key=lambda card: (CARD_TYPE_ORDER.index(card.type), card.name))
+        self._card_ids = None
+        self.zobrist = sum(zobrist.key("hand", card.id) for card in cards) & zobrist.MASK
 
     def add_cards(self, cards: list[models.Card]) -> None:
-        """Shuffle the hand."""
-        self.cards.extend(cards)
-        self._sort_cards()
+        """Add cards to the hand."""
+        for card in cards:
+            key = _sort_key(card)
+            index = bisect.bisect_right(self._keys, key)
+            self._keys.insert(index, key)
+            self.cards.insert(index, card)
+            self._amounts[card.id] = self._amounts.get(card.id, 0) + 1
+            self.zobrist += zobrist.key("hand", card.id)
+
+        self.zobrist &= zobrist.MASK
+        self._card_ids = None
 
     def remove_card(self, id: int) -> models.Card:
         """Remove a card from the hand."""
-        for index, card in enumerate(self.cards):
-            if card.id == id:
-                return self.cards.pop(index)
+        index = self.index(id)
+        if self._amounts[id] == 1:
+            del self._amounts[id]
+        else:
+            self._amounts[id] -= 1
+
+        del self._keys[index]
+        self._card_ids = None
+        self.zobrist = (self.zobrist - zobrist.key("hand", id)) & zobrist.MASK
+        return self.cards.pop(index)
 
-        raise ValueError(f"Card with id {id} not found in hand.")
+    def index(self, id: int) -> int:
+        """Return the position of the first copy of a card in the hand."""
+        key = _SORT_KEYS.get(id)
+        if key is None or not self._amounts.get(id):
+            raise ValueError(f"Card with id {id} not found in hand.")
+
+        return bisect.bisect_left(self._keys, key)
+
+    def count(self, id: int) -> int:
+        """Return the amount of copies of a card in the hand."""
+        return self._amounts.get(id, 0)
+
+    def __contains__(self, id: int) -> bool:
+        """Check if a card is in the hand."""
+        return id in self._amounts
 
     def __getitem__(self, index: int) -> models.Card:
         """Get a card from the hand."""
@@ -49,5 +127,11 @@ class Hand:
 
     @property
     def card_ids(self) -> list[int]:
-        """Return the ids of the cards in the hand."""
-        return [card.id for card in self.cards]
+        """Return the ids of the cards in the hand.
+
+        The list is cached until the hand changes, so it must not be mutated.
+        """
+        if self._card_ids is None:
+            self._card_ids = [card.id for card in self.cards]
+
+        return self._card_ids
@@ -1,8 +1,10 @@
 """Player interface."""
+import random
 import typing
 
 from invokator import models
 
+from . import zobrist
 from .character import Character
 from .deck import Deck
 from .dice import Dice
@@ -19,6 +21,18 @@ class Player:
     characters: list[Character]
     deck: Deck
 
+    alive_mask: int
+    """Bit flags of the alive characters by index."""
+
+    alive_count: int
+    """The amount of alive characters."""
+
+    _alive_characters: list[Character] | None
+    _characters_by_id: dict[int, Character]
+
+    _zobrist: int
+    """Running hash of the characters, the summons and the active character."""
+
     active_character: Character | None  # pointer
 
     hand: Hand
@@ -28,29 +42,121 @@ class Player:
 
     declared_end: bool
 
+    rng: random.Random
+
     def __init__(
         self,
         id: int,
         characters: list[Character],
         deck: list[models.Card],
+        *,
+        rng: random.Random | None = None,
     ) -> None:
         self.id = id
         self.characters = characters
-        self.deck = Deck(deck)
+        self._adopt_characters()
+        self.rng = rng or random.Random()
+        self.deck = Deck(deck, rng=self.rng)
 
         self.active_character = None
 
         self.hand = Hand()
-        self.dice = Dice(preferred_elements=self._usable_elements)
+        self.dice = Dice(preferred_elements=self._usable_elements, rng=self.rng)
 
         self.summons = []
 
         self.declared_end = False
 
+        self.rehash()
+
+    def clone(self, *, rng: random.Random | None = None) -> "Player":
+        """Return a copy which can be mutated independently.
+
+        Card data, talents and effects are shared, only the mutable game state is copied.
+        The random generator is copied unless a new one is given, so the copy never advances the original.
+        """
+        player = Player.__new__(Player)
+        player.id = self.id
+        player.characters = [character.clone() for character in self.characters]
+        player._adopt_characters()
+        if rng is None:
+            rng = random.Random()
+            rng.setstate(self.rng.getstate())
+        player.rng = rng
+        player.deck = self.deck.clone(rng=player.rng)
+
+        player.active_character = None
+        if self.active_character is not None:
+            player.active_character = player.characters[self.characters.index(self.active_character)]
+
+        player.hand = self.hand.clone()
+        player.dice = self.dice.clone(rng=player.rng)
+
+        player.summons = [summon.clone() for summon in self.summons]
+
+        player.declared_end = self.declared_end
+        player._zobrist = self._zobrist
+        return player
+
+    def _adopt_characters(self) -> None:
+        """Index the characters and let them report their deaths."""
+        self._characters_by_id = {}
+        for slot, character in enumerate(self.characters):
+            character._player = self
+            character._slot = slot
+            self._characters_by_id[character.id] = character
+
+        self.reset_alive()
+
+    def reset_alive(self) -> None:
+        """Recompute the alive characters after their health has been set directly."""
+        self.alive_mask = 0
+        for slot, character in enumerate(self.characters):
+            if character.current_health > 0:
+                self.alive_mask |= 1 << slot
+
+        self.alive_count = self.alive_mask.bit_count()
+        self._alive_characters = None
+
+    def set_alive(self, slot: int, alive: bool) -> None:
+        """Mark a character as alive or dead, called by characters whose health crosses zero."""
+        if alive:
+            self.alive_mask |= 1 << slot
+        else:
+            self.alive_mask &= ~(1 << slot)
+
+        self.alive_count = self.alive_mask.bit_count()
+        self._alive_characters = None
+
+    def rehash(self) -> None:
+        """Recompute the running hash after characters or summons have been changed directly."""
+        value = 0
+        for character in self.characters:
+            value ^= character.zobrist
+        for summon in self.summons:
+            value ^= summon.zobrist
+
+        if self.active_character is not None:
+            value ^= zobrist.key("active", self.active_character.id)
+
+        self._zobrist = value
+
+    def toggle_zobrist(self, key: int) -> None:
+        """Toggle a key in the running hash, called by characters whose state changes."""
+        self._zobrist ^= key
+
     @property
     def alive_characters(self) -> list[Character]:
-        """Return list of alive characters."""
-        return [character for character in self.characters if character.current_health > 0]
+        """Return list of alive characters.
+
+        The list is cached until a character dies or is revived, so it must not be mutated.
+        """
+        if self._alive_characters is None:
+            self._alive_characters = [
+                character for slot, character in enumerate(self.characters) if self.alive_mask >> slot & 1
+            ]
+
+        return self._alive_characters
 
     @property
     def _usable_elements(self) -> list[models.Element]:
@@ -59,22 +165,39 @@ class Player:
 
     def switch_character(self, id: int) -> None:
         """Switch active character."""
-        character = next((character for character in self.characters if character.id == id), None)
+        character = self._characters_by_id.get(id)
         if character is None:
             raise ValueError("Invalid character id.")
 
+        if self.active_character is not None:
+            self._zobrist ^= zobrist.key("active", self.active_character.id)
+        self._zobrist ^= zobrist.key("active", character.id)
+
         self.active_character = character
         self.dice.preferred_elements = [
             character.element,
             *self._usable_elements,
         ]
 
+    @property
+    def zobrist(self) -> int:
+        """Hash of the player's state.
+
+        Dice, hand, deck and the running hash of the characters are all maintained on every change.
+        """
+        value = self.dice.zobrist ^ self.hand.zobrist ^ self.deck.zobrist ^ self._zobrist
+        if self.declared_end:
+            value ^= zobrist.key("declared_end")
+
+        return zobrist.mix(value, self.id)
+
     def clear_expired_effects(self) -> None:
         """Clear all effects that have ran out."""
         for character in self.characters:
             character.status = [effect for effect in character.status if effect.duration > 0]
 
         self.summons = [summon for summon in self.summons if summon.usage_left > 0]
+        self.rehash()
 
     def draw_cards(self, amount: int) -> list[models.Card]:
         """Draw cards from deck."""
@@ -3,6 +3,8 @@ import typing
 
 from invokator import models
 
+from . import zobrist
+
 __all__ = ["Summon"]
 
 
@@ -17,3 +19,13 @@ class Summon(models.Summon):
 
         self.usage_left = self.usage
         self.infused_element = None
+
+    def clone(self) -> "Summon":
+        """Return a copy sharing the immutable card data."""
+        return self.copy()
+
+    @property
+    def zobrist(self) -> int:
+        """Hash of the summon's mutable state."""
+        element = self.infused_element and self.infused_element.value
+        return zobrist.key("summon", self.id, self.usage_left, element)
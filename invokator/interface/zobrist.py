@@ -0,0 +1,25 @@
+"""Zobrist keys for incremental state hashing."""
+import functools
+import hashlib
+import typing
+
+__all__ = ["MASK", "key", "mix"]
+
+MASK = (1 << 64) - 1
+"""Mask of a 64-bit hash."""
+
+
+@functools.lru_cache(maxsize=None)
+def key(*feature: typing.Hashable) -> int:
+    """Return the 64-bit key of a state feature.
+
+    Keys are derived from the feature itself, so they are the same in every process.
+    """
+    digest = hashlib.blake2b(repr(feature).encode(), digest_size=8).digest()
+    return int.from_bytes(digest, "little")
+
+
+def mix(value: int, salt: int) -> int:
+    """Scramble a hash with a salt, so equal parts of different owners hash differently."""
+    value = ((value ^ key("salt", salt)) * 0x9E3779B97F4A7C15) & MASK
+    return value ^ (value >> 29)
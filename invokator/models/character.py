@@ -29,6 +29,11 @@ class Character(pydantic.BaseModel):
     talents: list[Talent]
     effects: list[Effect] = []
 
+    _talent_index: dict[int, Talent] | None = pydantic.PrivateAttr(None)
+
     def get_talent(self, id: int) -> Talent | None:
         """Get talent by id."""
-        return next((talent for talent in self.talents if talent.id == id), None)
+        if self._talent_index is None:
+            self._talent_index = {talent.id: talent for talent in self.talents}
+
+        return self._talent_index.get(id)
@@ -0,0 +1,38 @@
+"""Test legal action enumeration."""
+import random
+
+from invokator import game, models
+from invokator.game import runner, utility
+
+
+def test_legal_actions() -> None:
+    """Enumerate the actions of a player with rolled dice."""
+    players = (runner.create_player(1, rng=random.Random(1)), runner.create_player(2, rng=random.Random(2)))
+    state = game.State(players, None)
+
+    assert {action.action for action in game.legal_actions(state)} == {game.Action.END, game.Action.CONCEDE}
+
+    character = state.me.characters[0]
+    passive = character.talents[0].copy(update={"id": 99, "type": models.TalentType.PASSIVE})
+    character.talents = [*character.talents, passive]
+
+    state.me.switch_character(character.id)
+    state.me.dice.dice = [models.Element.OMNI, models.Element.PYRO, models.Element.PYRO, models.Element.CRYO]
+    actions = game.legal_actions(state)
+
+    assert not any(action.action == game.Action.SWITCH for action in actions)
+
+    attacks = [action for action in actions if action.action == game.Action.ATTACK]
+    assert len(attacks) == len(set(attacks))
+    affordable = {talent.id for talent in character.talents if talent.id in utility.affordable(state.me).talents}
+    assert {action.talent for action in attacks} == affordable
+    for action in attacks:
+        talent = state.me.characters[0].get_talent(action.talent or 0)
+        assert talent is not None
+        assert utility.is_enough_dice(action.dice, utility.talent_cost(talent))
+
+    # normal attack: 3 of the 4 dice including a pyro or omni, skill: 3 pyro dice with at most one omni
+    talents = [talent.id for talent in state.me.characters[0].talents]
+    assert sum(action.talent == talents[0] for action in attacks) == 3
+    assert sum(action.talent == talents[1] for action in attacks) == 1
+    assert sum(action.talent == talents[2] for action in attacks) == 0
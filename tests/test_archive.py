@@ -0,0 +1,62 @@
+"""Test columnar game archives."""
+import asyncio
+import io
+import json
+import pathlib
+
+import pytest
+
+from invokator.game import archive, events, replay, runner
+
+
+def test_archive_games(tmp_path: pathlib.Path) -> None:
+    """Archive concurrent games and query their columns."""
+    with archive.ArchiveWriter(tmp_path, flush_rows=500) as writer:
+        results = asyncio.run(runner.run_games(6, writer=writer))
+
+    games = archive.Archive(tmp_path)
+    assert len(games.games) == 6
+
+    by_seed = {result.seed: result for result in results}
+    for game in range(len(games.games)):
+        result = by_seed[games.games["seed"][game]]
+        assert games.games["loser"][game] == result.loser
+        assert games.games["turns"][game] == result.turns
+
+        rows = games.game_events(game)
+        assert all(games.events["game"][row] == game for row in rows)
+        assert games.event_types[games.events["type"][rows[-1]]] in ("LostEvent", "ConcededEvent")
+
+    talent = games.event_type(events.TalentEvent)
+    damage = [amount for kind, amount in zip(games.events["type"], games.events["amount"]) if kind == talent]
+    assert damage and all(amount > 0 for amount in damage)
+    games.close()
+
+
+def test_archive_appends_logs(tmp_path: pathlib.Path) -> None:
+    """Reopen an archive and append a recorded game to it."""
+    with archive.ArchiveWriter(tmp_path) as writer:
+        runner.play_games(2, writer=writer)
+
+    log = io.BytesIO()
+    runner.play_game(2, log=log)
+    with archive.ArchiveWriter(tmp_path) as writer:
+        writer.add_log(replay.read_log(log.getvalue()))
+
+    games = archive.Archive(tmp_path)
+    assert list(games.games["seed"]) == [0, 1, 2]
+    assert games.games["start"][2] + games.games["events"][2] == len(games.events)
+    games.close()
+
+
+def test_archive_rejects_other_event_types(tmp_path: pathlib.Path) -> None:
+    """Refuse to append to an archive whose type tags mean other events."""
+    with archive.ArchiveWriter(tmp_path) as writer:
+        runner.play_games(1, writer=writer)
+
+    meta = json.loads((tmp_path / "meta.json").read_text())
+    meta["event_types"].reverse()
+    (tmp_path / "meta.json").write_text(json.dumps(meta))
+
+    with pytest.raises(ValueError):
+        archive.ArchiveWriter(tmp_path)
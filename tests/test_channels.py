@@ -0,0 +1,34 @@
+"""Test the buffered communication channels."""
+import asyncio
+import random
+import typing
+
+from invokator import game
+from invokator.game import bot, comm, runner
+from invokator.game.comm import events
+
+
+def test_buffered_game() -> None:
+    """Play a game through buffered channels with requests only at the end of frames."""
+    players = (runner.create_player(1, rng=random.Random(1)), runner.create_player(2, rng=random.Random(2)))
+    frames: list[comm.Frame] = []
+
+    def channel(player: bot.RandomBot) -> comm.BufferedChannel:
+        deliver = comm.unbuffered(player)
+
+        async def record(frame: comm.Frame) -> typing.Any:
+            frames.append(frame)
+            return await deliver(frame)
+
+        return comm.BufferedChannel(record)
+
+    channels = (channel(bot.RandomBot(1, rng=random.Random(1))), channel(bot.RandomBot(2, rng=random.Random(2))))
+    asyncio.run(game.start(players, channels, rng=random.Random(0)))
+
+    assert sum(channel.frames for channel in channels) == len(frames)
+    assert all(not channel.pending for channel in channels)
+    assert sum(map(len, frames)) > 2 * len(frames)
+
+    for frame in frames:
+        assert not any(isinstance(event, events.RequestEvent) for event in frame[:-1])
+    assert any(isinstance(event, events.EndGameEvent) for event in frames[-1])
@@ -0,0 +1,56 @@
+"""Test the event codec."""
+import random
+import typing
+
+from invokator import game, models
+from invokator.game import bot, comm, runner
+from invokator.game.comm import codec, events, wire
+
+
+def test_roundtrip_game_events() -> None:
+    """Encode and decode every event of a game."""
+    players = (runner.create_player(1, rng=random.Random(1)), runner.create_player(2, rng=random.Random(2)))
+    seen: list[comm.BaseEvent[typing.Any]] = []
+
+    def recording(bot: bot.RandomBot) -> game.Responder:
+        def respond(event: comm.BaseEvent[typing.Any]) -> typing.Any:
+            seen.append(event)
+            return bot.respond(event)
+
+        return respond
+
+    responders = {player.id: recording(bot.RandomBot(player.id, rng=random.Random(player.id))) for player in players}
+    game.Engine(players, rng=random.Random(0)).run(responders)
+
+    assert len({type(event) for event in seen}) > 10
+    for event in seen:
+        decoded = codec.from_json(event.to_json())
+        assert type(decoded) is type(event)
+        assert decoded == event
+        assert codec.from_bytes(event.to_bytes()) == event
+        assert wire.decode_event(wire.encode_event(event)) == event
+
+
+def test_wire_roundtrip() -> None:
+    """Encode and decode events and responses in the binary protocol."""
+    event = events.DiceRequestEvent(
+        cost=[models.DiceCost(amount=1, element=models.Element.PYRO), models.DiceCost(amount=2)],
+        recommended=None,
+    )
+    damage = events.StatusDamageEvent(side=2, target=1301, current=-3, damage=2, element=None, source="STATUS")
+
+    frame = wire.decode_frame(wire.encode_frame([damage, event]))
+    assert frame == [damage, event]
+    assert [type(decoded) for decoded in frame] == [events.StatusDamageEvent, events.DiceRequestEvent]
+    assert len(wire.encode_event(event)) < len(event.json()) // 5
+
+    dice = [models.Element.OMNI, models.Element.GEO]
+    assert wire.decode_response(events.DiceRequestEvent, wire.encode_response(events.DiceRequestEvent, dice)) == dice
+    encoded = wire.encode_response(events.ActionRequestEvent, None)
+    assert wire.decode_response(events.ActionRequestEvent, encoded) is None
+    action = wire.encode_response(events.ActionRequestEvent, game.Action.END)
+    assert wire.decode_response(events.ActionRequestEvent, action) is game.Action.END
+
+    reroll = events.DiceChangeRequestEvent(possible=dice)
+    assert reroll.recommended == []
+    assert wire.decode_event(wire.encode_event(reroll)) == reroll
@@ -0,0 +1,38 @@
+"""Test the compact player state."""
+import random
+
+from invokator import interface
+from invokator.game import runner
+
+
+def _create_player() -> interface.Player:
+    player = runner.create_player(1, rng=random.Random(0))
+    player.draw_cards(5)
+    player.switch_character(player.characters[1].id)
+    player.dice.roll(8)
+    player.characters[1].change_health(-3)
+    return player
+
+
+def test_compact_roundtrip() -> None:
+    """Convert a player to a compact snapshot and back."""
+    player = _create_player()
+    compact = interface.CompactPlayer.from_player(player)
+
+    restored = compact.to_player()
+    assert restored.dict() == player.dict()
+    assert restored.deck.card_ids == player.deck.card_ids
+
+
+def test_compact_copy_is_independent() -> None:
+    """Mutate a copy without touching the original snapshot."""
+    player = _create_player()
+    compact = interface.CompactPlayer.from_player(player)
+
+    copy = compact.copy()
+    copy.health[0] = 0
+    copy.dice[0] += 1
+
+    assert compact.health[0] == player.characters[0].current_health
+    compact.apply(player)
+    assert player.characters[0].current_health != 0
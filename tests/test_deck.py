@@ -0,0 +1,21 @@
+"""Test the deck interface."""
+import random
+
+import pytest
+
+from invokator import interface, models
+
+
+def test_deck_draws() -> None:
+    """Track the remaining cards of a lazily shuffled deck."""
+    cards = models.CARDS * 2
+    deck = interface.Deck(cards.copy(), rng=random.Random(0))
+    drawn = deck.draw_multiple(10) + deck.reshuffle(cards[:3])
+
+    assert sorted(drawn + deck.cards, key=lambda card: card.id) == sorted(cards + cards[:3], key=lambda card: card.id)
+    assert deck.composition == {id: deck.card_ids.count(id) for id in set(deck.card_ids)}
+    assert deck.zobrist == interface.Deck(deck.cards.copy()).zobrist
+
+    id = deck.cards[0].id
+    assert deck.draw_probability(id, deck.amount) == 1.0
+    assert deck.draw_probability(id) == pytest.approx(deck.count(id) / deck.amount)
@@ -0,0 +1,138 @@
+"""Test the dice interface."""
+import itertools
+import random
+import typing
+
+import pytest
+
+from invokator import interface, models
+from invokator.game import bot, engine, events, runner, utility
+
+E = models.Element
+
+
+def test_dice_order() -> None:
+    """Sort omni first, then preferred elements, then larger groups."""
+    dice = interface.Dice(preferred_elements=[E.PYRO])
+    dice.replace([E.CRYO, E.GEO, E.OMNI, E.GEO, E.PYRO])
+
+    assert dice.dice == [E.OMNI, E.PYRO, E.GEO, E.GEO, E.CRYO]
+    assert dice.counts == [0, 1, 0, 0, 2, 0, 1, 1]
+
+
+def test_dice_changes() -> None:
+    """Reroll and remove dice from the count vector."""
+    dice = interface.Dice(preferred_elements=[], rng=random.Random(0))
+    dice.roll(8)
+    before = dice.dice
+
+    new = dice.reroll(before[:3])
+    assert len(new) == 3
+    assert dice.amount == 8
+
+    dice.remove(dice.dice[:5])
+    assert dice.amount == 3
+
+    counts, zobrist = dice.counts.copy(), dice.zobrist
+    missing = [die for die in interface.dice.ELEMENTS if die not in dice.dice][:1]
+    assert not dice.has(dice.dice + missing)
+    with pytest.raises(ValueError):
+        dice.remove(dice.dice + missing)
+    with pytest.raises(ValueError):
+        dice.reroll(dice.dice + missing)
+    assert dice.counts == counts and dice.zobrist == zobrist
+
+    fresh = interface.Dice(preferred_elements=[])
+    fresh.replace(dice.dice)
+    assert fresh.zobrist == dice.zobrist
+
+
+def test_recommend_dice() -> None:
+    """Recommend the payment which keeps omni and preferred dice."""
+    dice = interface.Dice(preferred_elements=[E.PYRO])
+    dice.replace([E.OMNI, E.PYRO, E.PYRO, E.CRYO, E.GEO, E.GEO, E.GEO])
+
+    pyro = [models.DiceCost(amount=1, element=E.PYRO), models.DiceCost(amount=2, element=E.OMNI)]
+    assert utility.recommend_dice(dice, utility.normalize_cost(pyro)) == [E.CRYO, E.GEO, E.PYRO]
+
+    same = [models.DiceCost(amount=3)]
+    assert utility.recommend_dice(dice, utility.normalize_cost(same)) == [E.GEO, E.GEO, E.GEO]
+
+    assert utility.recommend_dice(dice, utility.normalize_cost([models.DiceCost(amount=5)])) is None
+    assert not utility.is_enough_dice([E.PYRO, E.OMNI], utility.normalize_cost(pyro))
+    assert utility.is_enough_dice([E.PYRO, E.OMNI, E.GEO], utility.normalize_cost(pyro))
+    assert not utility.is_enough_dice([E.PYRO, E.OMNI, E.GEO, E.GEO], utility.normalize_cost(pyro))
+
+
+def test_affordable() -> None:
+    """Match the per-talent recommendations and recompute after the dice change."""
+    player = runner.create_player(1, rng=random.Random(3))
+    player.hand.add_cards(player.deck.draw_multiple(5))
+    player.switch_character(player.characters[0].id)
+    player.dice.roll()
+
+    result = utility.affordable(player)
+    assert utility.affordable(player) is result
+
+    for character in player.characters:
+        for talent in character.talents:
+            assert result.talents.get(talent.id) == utility.recommend_dice(player.dice, utility.talent_cost(talent))
+
+    for card in player.hand.cards:
+        assert result.cards.get(card.id) == utility.recommend_dice(player.dice, utility.card_cost(card))
+
+    player.dice.remove(player.dice.dice[:6])
+    assert utility.affordable(player) is not result
+
+
+def test_reroll_odds() -> None:
+    """Compare the odds tables with every possible roll."""
+    cost = utility.normalize_cost(
+        [models.DiceCost(amount=2, element=E.PYRO), models.DiceCost(amount=1, element=E.OMNI)]
+    )
+    kept = utility.count_dice([E.PYRO, E.GEO])
+
+    rolls = list(itertools.product(interface.dice.ELEMENTS, repeat=3))
+    expected = sum(utility.can_pay(utility.count_dice([E.PYRO, E.GEO, *roll]), cost) for roll in rolls) / len(rolls)
+    assert utility.afford_probability(kept, 3, cost) == pytest.approx(expected)
+
+    # keep the pyro and omni dice, reroll the rest
+    counts = utility.count_dice([E.OMNI, E.PYRO, E.GEO, E.GEO, E.CRYO])
+    pyro = utility.normalize_cost([models.DiceCost(amount=3, element=E.PYRO)])
+    advice = utility.advise_reroll(counts, (pyro,))
+    assert advice.reroll == utility.count_dice([E.GEO, E.GEO, E.CRYO])
+    assert advice.odds == (pytest.approx(1 - (6 / 8) ** 3),)
+    assert sum(utility.advise_reroll(counts, ()).reroll) == 0
+
+
+def test_non_dice_elements() -> None:
+    """Reject payments and rerolls of elements which are not dice instead of crashing."""
+    dice = interface.Dice(preferred_elements=[], rng=random.Random(0))
+    dice.roll(8)
+    assert not dice.has([E.PHYSICAL])
+    with pytest.raises(ValueError):
+        dice.remove([E.INFUSED])
+
+    cost = utility.normalize_cost([models.DiceCost(amount=1, element=E.OMNI)])
+    assert not utility.is_enough_dice([E.PHYSICAL], cost)
+
+    _, players, bots, rng = runner._create_game(0, None)
+    game = engine.Engine(players, rng=rng)
+    player = bot.RandomBot(players[0].id, rng=random.Random(0))
+    errors: list[str] = []
+
+    def hostile(event: events.BaseEvent[typing.Any]) -> typing.Any:
+        match event:
+            case events.ErrorEvent():
+                errors.append(event.message)
+            case events.DiceChangeRequestEvent():
+                return [E.PHYSICAL]
+            case events.DiceRequestEvent():
+                player.can_attack = False
+                return [E.INFUSED]
+
+        return player.respond(event)
+
+    game.run({players[0].id: hostile, players[1].id: bots[1].respond})
+    assert game.finished
+    assert errors.count("Invalid dice!") > 1
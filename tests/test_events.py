@@ -0,0 +1,35 @@
+"""Test the event projections."""
+import random
+
+from invokator import game, models
+from invokator.game import runner
+from invokator.game.comm import events
+
+
+def test_public_projection() -> None:
+    """Hide private fields from everyone but the event's side."""
+    event = events.DiceAddEvent(
+        side=1, current_amount=2, current=[models.Element.PYRO] * 2, amount=2, dice=[models.Element.PYRO] * 2
+    )
+
+    assert event.project(1) is event
+    assert event.project(2) is event.public()
+    assert event.public().dict() == {"side": 1, "current_amount": 2, "current": None, "amount": 2, "dice": None}
+    assert event.current is not None
+
+    switch = events.SwitchEvent(side=1, target=2, previous=None)
+    assert switch.project(2) is switch
+
+
+def test_engine_projects_events() -> None:
+    """Send the opponent's hand and dice to nobody but the opponent."""
+    players = (runner.create_player(1, rng=random.Random(1)), runner.create_player(2, rng=random.Random(2)))
+    delivered, _ = game.Engine(players, rng=random.Random(0)).start()
+
+    draws = [(player_id, event) for player_id, event in delivered if isinstance(event, events.CardDrawEvent)]
+    assert draws
+    for player_id, event in draws:
+        if player_id == event.side:
+            assert event.cards is not None
+        else:
+            assert event.cards is None and event.current is None
@@ -0,0 +1,27 @@
+"""Test the hand interface."""
+import random
+
+import pytest
+
+from invokator import interface, models
+
+
+def test_hand_order() -> None:
+    """Keep the hand sorted through random additions and removals."""
+    rng = random.Random(0)
+    hand = interface.Hand(rng.choices(models.CARDS, k=5))
+
+    for _ in range(200):
+        if hand.amount and rng.random() < 0.5:
+            id = rng.choice(hand.card_ids)
+            assert hand.remove_card(id).id == id
+        else:
+            hand.add_cards(rng.choices(models.CARDS, k=rng.randint(1, 3)))
+
+        expected = sorted(hand.cards, key=lambda card: (interface.hand.CARD_TYPE_ORDER.index(card.type), card.name))
+        assert hand.card_ids == [card.id for card in expected]
+        assert all(hand.count(id) == hand.card_ids.count(id) for id in hand.card_ids)
+        assert hand.zobrist == interface.Hand(hand.cards.copy()).zobrist
+
+    with pytest.raises(ValueError):
+        hand.remove_card(-1)
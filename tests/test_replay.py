@@ -0,0 +1,53 @@
+"""Test game recordings and replays."""
+import asyncio
+import io
+
+from invokator.game import replay, runner
+
+
+def test_replay_recorded_game() -> None:
+    """Replay a game recorded by the asynchronous driver."""
+    log = io.BytesIO()
+    result = asyncio.run(runner.run_game(7, log=log))
+
+    recorded = replay.read_log(log.getvalue())
+    assert recorded.setup.seed == 7
+    assert sum(len(responses) for responses in recorded.responses.values()) > 0
+
+    delivered: list[int] = []
+    game = replay.replay(recorded, observer=lambda player_id, _: delivered.append(player_id))
+    assert game.finished
+    assert len(delivered) == len(recorded.deliveries)
+
+    loser = next(player.id for player in game.state.players if not player.alive_count)
+    assert loser == result.loser
+
+
+def test_replay_truncated_log() -> None:
+    """Replay a log cut short up to its last response."""
+    log = io.BytesIO()
+    runner.play_game(7, log=log)
+    data = log.getvalue()
+
+    assert replay.replay(data).finished
+    assert not replay.replay(data[: len(data) // 2]).finished
+
+
+def test_seek_keyframes() -> None:
+    """Seek to every turn from stored keyframes and from the start of the game."""
+    log = io.BytesIO()
+    result = runner.play_game(3, log=log)
+
+    indexed = replay.Replay(log.getvalue())
+    assert [keyframe.round for keyframe in indexed.keyframes] == list(range(1, result.rounds + 1))
+
+    stored = io.BytesIO()
+    indexed.write_keyframes(stored)
+    seeking = replay.Replay(indexed.log, replay.read_keyframes(stored.getvalue()))
+    rewinding = replay.Replay(indexed.log, [])
+
+    for turn in range(1, result.turns + 2):
+        seeked, rewound = seeking.seek(turn), rewinding.seek(turn)
+        assert seeked.state.zobrist == rewound.state.zobrist
+        assert seeked.request == rewound.request
+        assert seeked.finished == rewound.finished == (turn > result.turns)
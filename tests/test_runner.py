@@ -0,0 +1,48 @@
+"""Test the headless game runner."""
+import asyncio
+
+from invokator.game import runner, tournament
+
+
+def test_run_games() -> None:
+    """Run a small batch of bot games to completion."""
+    results = asyncio.run(runner.run_games(10, seed=0))
+
+    assert len(results) == 10
+    for result in results:
+        assert result.loser is not None
+        assert result.winner not in (None, result.loser)
+        assert result.rounds > 0
+        assert result.turns > 0
+
+    report = runner.Report.from_results(results, elapsed=1.0)
+    assert report.games == 10
+    assert report.p50 <= report.p99
+
+
+def test_tournament_tally() -> None:
+    """Aggregate the results of a worker shard."""
+    tally = tournament.Tally()
+    for result in tournament.play_shard((0, 5)):
+        tally.add(result)
+
+    assert tally.games == 5
+    assert sum(tally.wins.values()) + tally.unfinished == 5
+    assert tally.rounds > 0
+
+
+def test_seeded_games_are_reproducible() -> None:
+    """Replay a game from its seed."""
+    first = asyncio.run(runner.run_game(42))
+    second = asyncio.run(runner.run_game(42))
+
+    assert first._replace(duration=0) == second._replace(duration=0)
+
+
+def test_engine_matches_gameloop() -> None:
+    """Play the same seeded game with both drivers of the rules."""
+    for seed in range(5):
+        asynchronous = asyncio.run(runner.run_game(seed))
+        synchronous = runner.play_game(seed)
+
+        assert asynchronous._replace(duration=0) == synchronous._replace(duration=0)
@@ -0,0 +1,164 @@
+"""Test the game server on loopback."""
+import asyncio
+import json
+import pathlib
+import random
+import typing
+
+import pytest
+
+from invokator import models
+from invokator.game import bot, comm, events, replay, server
+from invokator.game.comm import wire
+
+
+def test_loopback_games(tmp_path: pathlib.Path) -> None:
+    """Play several concurrent recorded games between remote bots."""
+
+    async def run() -> int:
+        host = server.GameServer(seed=0, log_directory=tmp_path)
+        await host.start()
+
+        clients = [
+            server.play_remote(bot.RandomBot(index, rng=random.Random(index)), port=host.port) for index in range(8)
+        ]
+        await asyncio.wait_for(asyncio.gather(*clients), timeout=60)
+        await host.close()
+        return host.games
+
+    assert asyncio.run(run()) == 4
+
+    logs = sorted(tmp_path.iterdir())
+    assert len(logs) == 4
+    for log in logs:
+        assert replay.replay(log.read_bytes()).finished
+
+
+def _recording(callback: comm.Callback, received: list[events.BaseEvent[typing.Any]]) -> comm.Callback:
+    """Keep the events delivered to a callback."""
+
+    async def record(event: events.BaseEvent[typing.Any]) -> typing.Any:
+        received.append(event)
+        return await callback(event)
+
+    return record
+
+
+async def _hostile_client(port: int) -> None:
+    """Answer every request with garbage or with things the player does not own."""
+    reader, writer = await asyncio.open_connection("127.0.0.1", port)
+    server.write_frame(writer, json.dumps([]).encode())
+
+    while True:
+        try:
+            frame = wire.decode_frame(await server.read_frame(reader))
+        except asyncio.IncompleteReadError:
+            break
+
+        request: typing.Any = frame[-1]
+        match request:
+            case events.CardsChangeRequestEvent():
+                response = wire.encode_response(type(request), [0, 0, 0, 0, 0, 0])
+            case events.CharacterRequestEvent():
+                response = wire.encode_response(type(request), 999)
+            case events.DiceChangeRequestEvent() | events.DiceRequestEvent():
+                response = wire.encode_response(type(request), [models.Element.OMNI] * 9)
+            case events.RequestEvent():
+                response = b"\xff"
+            case _:
+                continue
+
+        server.write_frame(writer, response)
+        await writer.drain()
+
+    writer.close()
+
+
+def test_hostile_client() -> None:
+    """Finish a game against a client sending malformed and impossible responses."""
+    received: list[events.BaseEvent[typing.Any]] = []
+    honest = _recording(bot.RandomBot(0, rng=random.Random(0)), received)
+
+    async def run() -> int:
+        host = server.GameServer(seed=0)
+        await host.start()
+        clients = [_hostile_client(host.port), server.play_remote(honest, port=host.port)]
+        await asyncio.wait_for(asyncio.gather(*clients), timeout=60)
+        await host.close()
+        return host.games
+
+    assert asyncio.run(run()) == 1
+    assert isinstance(received[-1], events.LostEvent)
+
+
+def test_disconnect_forfeits() -> None:
+    """Let the remaining player win when the opponent disconnects."""
+    received: list[events.BaseEvent[typing.Any]] = []
+    honest = _recording(bot.RandomBot(0, rng=random.Random(0)), received)
+
+    async def leave(port: int) -> None:
+        _, writer = await asyncio.open_connection("127.0.0.1", port)
+        server.write_frame(writer, json.dumps([]).encode())
+        await writer.drain()
+        await asyncio.sleep(0.1)
+        writer.close()
+
+    async def run() -> int:
+        host = server.GameServer(seed=0)
+        await host.start()
+        clients = [leave(host.port), server.play_remote(honest, port=host.port)]
+        await asyncio.wait_for(asyncio.gather(*clients), timeout=60)
+        await host.close()
+        return host.games
+
+    assert asyncio.run(run()) == 1
+    assert isinstance(received[-1], events.LostEvent)
+
+
+def test_frame_limit() -> None:
+    """Refuse frames larger than the limit before reading their payload."""
+
+    async def run() -> None:
+        reader = asyncio.StreamReader()
+        reader.feed_data(server.HEADER.pack(2048) + bytes(2048))
+        with pytest.raises(ConnectionError):
+            await server.read_frame(reader, max_frame=1024)
+
+    asyncio.run(run())
+
+
+def test_invalid_hellos() -> None:
+    """Close the connections of invalid hellos and of clients leaving before their game."""
+
+    async def hello(port: int, data: bytes) -> bytes:
+        reader, writer = await asyncio.open_connection("127.0.0.1", port)
+        server.write_frame(writer, data)
+        await writer.drain()
+        try:
+            return await reader.read()
+        finally:
+            writer.close()
+
+    async def leave(port: int) -> None:
+        _, writer = await asyncio.open_connection("127.0.0.1", port)
+        server.write_frame(writer, json.dumps([]).encode())
+        await writer.drain()
+        writer.close()
+        await asyncio.sleep(0.1)
+
+    async def run() -> int:
+        host = server.GameServer(seed=0)
+        await host.start()
+
+        for data in (b"{", b"[1, 1]", b"[999]", b"[true]", b"{}", b'{"spectate": "0"}', b"[" * 100000):
+            assert await asyncio.wait_for(hello(host.port, data), timeout=10) == b""
+
+        await leave(host.port)
+        clients = [
+            server.play_remote(bot.RandomBot(index, rng=random.Random(index)), port=host.port) for index in range(2)
+        ]
+        await asyncio.wait_for(asyncio.gather(*clients), timeout=60)
+        await host.close()
+        return host.games
+
+    assert asyncio.run(run()) == 1
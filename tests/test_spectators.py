@@ -0,0 +1,101 @@
+"""Test the fan-out of game events to spectators."""
+import asyncio
+import json
+import random
+import typing
+
+from invokator.game import bot, comm, engine, events, runner, server
+
+
+def test_slow_spectators() -> None:
+    """Encode every event once and skip or drop spectators which fall behind."""
+    encoded: list[events.BaseEvent[typing.Any]] = []
+
+    def encode(event: events.BaseEvent[typing.Any]) -> bytes:
+        encoded.append(event)
+        return event.to_bytes()
+
+    spectators = comm.Spectators(encode)
+    spectators.publish(events.StartRoundEvent(side=1))
+    assert not encoded
+
+    lagging = spectators.attach(limit=2)
+    strict = spectators.attach(limit=2, lag=False)
+    for side in (1, 2, 1):
+        spectators.publish(events.StartTurnEvent(side=side))
+    spectators.publish(events.CardDrawEvent(side=1, current_amount=5, current=[1, 2], amount=2, cards=[1, 2]))
+
+    assert len(encoded) == 4
+    assert encoded[-1].cards is None  # type: ignore
+    assert len(lagging) == 2 and lagging.skipped == 2
+    assert strict.dropped and len(strict) == 0
+    assert len(spectators) == 1
+
+    spectators.close()
+    assert len(asyncio.run(lagging.get())) == 2
+    assert asyncio.run(lagging.get()) == []
+
+
+def test_spectate_remote_game() -> None:
+    """Watch a game on a server from its first to its last event."""
+
+    async def run() -> list[events.BaseEvent[typing.Any]]:
+        host = server.GameServer(seed=0)
+        await host.start()
+
+        watched: list[events.BaseEvent[typing.Any]] = []
+
+        async def watch(event: events.BaseEvent[typing.Any]) -> None:
+            watched.append(event)
+
+        spectator = asyncio.create_task(server.watch_remote(watch, port=host.port, game=0))
+        await asyncio.sleep(0.1)
+
+        players = [server.play_remote(bot.RandomBot(id, rng=random.Random(id)), port=host.port) for id in range(2)]
+        await asyncio.wait_for(asyncio.gather(spectator, *players), timeout=60)
+        await host.close()
+        return watched
+
+    watched = asyncio.run(run())
+    assert isinstance(watched[-1], (events.LostEvent, events.ConcededEvent))
+    assert all(isinstance(event, events.Event) for event in watched)
+    assert not any(getattr(event, "current", None) for event in watched if isinstance(event, events.CardDrawEvent))
+
+
+def test_spectators_leave() -> None:
+    """Refuse games far ahead and forget spectators of the next game once they leave."""
+
+    async def spectate(port: int, game: int) -> tuple[asyncio.StreamReader, asyncio.StreamWriter]:
+        reader, writer = await asyncio.open_connection("127.0.0.1", port)
+        server.write_frame(writer, json.dumps({"spectate": game}).encode())
+        await writer.drain()
+        return reader, writer
+
+    async def run() -> None:
+        host = server.GameServer(seed=0)
+        await host.start()
+
+        reader, writer = await spectate(host.port, 5)
+        assert await asyncio.wait_for(reader.read(), timeout=10) == b""
+        writer.close()
+
+        _, writer = await spectate(host.port, 0)
+        await asyncio.sleep(0.1)
+        assert len(host._spectators[0]) == 1
+
+        writer.close()
+        await asyncio.sleep(0.1)
+        assert not host._spectators
+        await host.close()
+
+    asyncio.run(run())
+
+
+def test_engine_spectators() -> None:
+    """Publish the events of a synchronous game."""
+    _, players, bots, rng = runner._create_game(0, None)
+    game = engine.Engine(players, rng=rng)
+    spectator = game.state.spectators.attach(limit=10000)
+
+    game.run({players[0].id: bots[0].respond, players[1].id: bots[1].respond})
+    assert spectator.closed and len(spectator) > 0
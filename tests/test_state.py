@@ -0,0 +1,80 @@
+"""Test the game state."""
+import random
+
+from invokator import game, interface
+from invokator.game import runner
+
+
+def _create_state() -> game.State:
+    players = (runner.create_player(1, rng=random.Random(1)), runner.create_player(2, rng=random.Random(2)))
+    for player in players:
+        player.draw_cards(5)
+        player.dice.roll(8)
+        player.switch_character(player.characters[0].id)
+
+    return game.State(players, None, rng=random.Random(0))
+
+
+def test_clone_is_independent() -> None:
+    """Mutate a clone without touching the original state."""
+    state = _create_state()
+    before = [player.dict() for player in state.players]
+
+    clone = state.clone()
+    assert [player.dict() for player in clone.players] == before
+    assert clone.me.rng is not state.me.rng and clone.me.rng is not clone.opponent.rng
+    assert clone.me.rng.getstate() == state.me.rng.getstate()
+
+    clone.me.characters[0].change_health(-5)
+    clone.me.dice.remove(clone.me.dice.dice[:2])
+    clone.me.draw_cards(2)
+    clone.opponent.switch_character(clone.opponent.characters[2].id)
+
+    assert [player.dict() for player in state.players] == before
+    assert clone.me.active_character is clone.me.characters[0]
+    assert clone.me.characters[0].talents is state.me.characters[0].talents
+
+
+def test_alive_characters() -> None:
+    """Track deaths through health changes, independently in clones."""
+    state = _create_state()
+    clone = state.clone()
+
+    clone.me.characters[1].change_health(-100)
+    assert clone.me.alive_count == 2
+    assert clone.me.alive_characters == [clone.me.characters[0], clone.me.characters[2]]
+    assert state.me.alive_count == 3
+
+    clone.me.characters[1].change_health(1)
+    assert clone.me.alive_mask == 0b111
+
+    for character in clone.opponent.characters:
+        character.change_health(-100)
+    assert game.gameloop.has_all_characters_dead(clone) == clone.opponent.id
+
+
+def test_incremental_hash() -> None:
+    """Compare incrementally maintained hashes with freshly computed ones during a game."""
+    players = (runner.create_player(1, rng=random.Random(1)), runner.create_player(2, rng=random.Random(2)))
+    bots = {player.id: game.bot.RandomBot(player.id, rng=random.Random(player.id)) for player in players}
+    engine = game.Engine(players, rng=random.Random(0))
+
+    _, request = engine.start()
+    seen: set[int] = set()
+    while request is not None:
+        for player in players:
+            fresh = interface.CompactPlayer.from_player(player).to_player()
+            assert fresh.zobrist == player.zobrist
+
+        seen.add(engine.state.zobrist)
+        _, request = engine.step(bots[request[0]].respond(request[1]))
+
+    assert len(seen) > 1
+
+    clone = engine.state.clone()
+    assert clone.zobrist == engine.state.zobrist
+    player = clone.me
+    player.characters[0].change_health(-100)
+    player.characters[0].change_health(1)
+    assert player.zobrist == interface.CompactPlayer.from_player(player).to_player().zobrist
+    assert clone.zobrist != engine.state.zobrist
@@ -0,0 +1,53 @@
+"""Test the deadlines of communication channels."""
+import asyncio
+import random
+import typing
+
+from invokator import game
+from invokator.game import bot, comm, runner
+from invokator.game.comm import events
+
+
+def test_timed_channel() -> None:
+    """Fall back to defaults when a callback stalls and its clock runs out."""
+    calls: list[events.BaseEvent[typing.Any]] = []
+
+    async def stalled(event: events.BaseEvent[typing.Any]) -> typing.Any:
+        calls.append(event)
+        await asyncio.sleep(10)
+
+    async def run() -> None:
+        timers = comm.Timers()
+        channel = comm.TimedChannel(stalled, timers, timeout=0.05, clock=0.08)
+
+        assert await channel(events.ActionRequestEvent()) is game.Action.END
+        assert await channel(events.TalentRequestEvent(possible=[1])) is None
+        assert channel.remaining == 0
+        assert await channel(events.ActionRequestEvent()) is game.Action.END
+        assert await channel(events.StartTurnEvent(side=1)) is None
+
+        assert channel.timeouts == 4
+        assert len(calls) == 3
+        assert len(timers) == 0
+
+    asyncio.run(run())
+
+
+def test_stalled_player_loses() -> None:
+    """Finish a game against a player who never answers."""
+    players = (runner.create_player(1, rng=random.Random(1)), runner.create_player(2, rng=random.Random(2)))
+
+    async def stalled(event: events.BaseEvent[typing.Any]) -> typing.Any:
+        if isinstance(event, events.RequestEvent):
+            await asyncio.sleep(10)
+
+    async def run() -> None:
+        timers = comm.Timers()
+        channels = (
+            comm.TimedChannel(stalled, timers, timeout=0.01, clock=0.05),
+            comm.TimedChannel(bot.RandomBot(2, rng=random.Random(2)), timers, timeout=0.01, clock=0.05),
+        )
+        await asyncio.wait_for(game.start(players, channels, rng=random.Random(0)), timeout=30)
+
+    asyncio.run(run())
+    assert players[0].alive_count == 0